@@ -4,27 +4,81 @@ D2C Configuration Management
 使用 Pydantic 进行类型安全的配置管理
 """
 
+import functools
 import json
 import os
+import re
+import sys
 import time
+
+try:
+    import orjson  # C 实现的 JSON 解析器，比标准库快约 5 倍
+    _JSON_DECODE_ERRORS = (json.JSONDecodeError, orjson.JSONDecodeError)
+except ImportError:
+    orjson = None
+    _JSON_DECODE_ERRORS = (json.JSONDecodeError,)
+
+try:
+    import msgspec  # orjson 之外的备选 C 解码器
+    _JSON_DECODE_ERRORS = _JSON_DECODE_ERRORS + (msgspec.DecodeError,)
+except ImportError:
+    msgspec = None
+
+try:
+    # 可选依赖：基于 inotify 的文件监听，未安装时退回 stat 轮询
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+except ImportError:
+    Observer = None
+    FileSystemEventHandler = object
 from pathlib import Path
 from typing import Optional
-from pydantic import BaseModel, Field, field_validator
-from pydantic_settings import BaseSettings, SettingsConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+@functools.cache
+def _logger():
+    """延迟初始化日志器：import config 时不拉起日志子系统，加快冷启动"""
+    from utils.logger import get_logger
+    return get_logger()
+
+
+# CRON 表达式允许的字符集之外的任意字符（预编译，C 层一次扫描）
+_CRON_BAD_RE = re.compile(r'[^0-9*/,\-?\s]')
+
 
-from utils.logger import get_logger
+def _load_env_file(path: str = '.env') -> dict:
+    """极简 .env 解析：每行 KEY=VALUE，# 开头为注释"""
+    env = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#') or '=' not in line:
+                    continue
+                key, _, value = line.partition('=')
+                env[key.strip()] = value.strip().strip('\'"')
+    except OSError:
+        pass
+    return env
 
-logger = get_logger()
 
+# .env 只在模块导入时读取一次
+_ENV_FILE = _load_env_file()
 
-class D2CConfig(BaseSettings):
+
+@functools.lru_cache(maxsize=32)
+def _tz_exists(tz: str) -> bool:
+    """检查时区文件是否存在（带缓存，避免每次校验都 stat）"""
+    return Path(f'/usr/share/zoneinfo/{tz}').exists()
+
+
+class D2CConfig(BaseModel):
     """D2C 配置模型"""
-    
-    model_config = SettingsConfigDict(
-        env_file='.env',
-        env_file_encoding='utf-8',
-        case_sensitive=False,
-        extra='ignore'
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        extra='ignore',
+        frozen=True  # 配置对象只读，属性访问走快速路径，可安全跨线程缓存
     )
     
     # 定时任务配置 - 支持标准 cron 表达式或特殊值: once, manual
@@ -108,113 +162,261 @@ class D2CConfig(BaseSettings):
         if len(parts) not in [5, 6]:
             raise ValueError(f'CRON表达式必须是5位或6位格式，当前: {len(parts)}位')
         
-        # 基本字符验证
-        valid_chars = set('0123456789*/,-? ')
-        for part in parts:
-            if not all(c in valid_chars for c in part):
-                raise ValueError(f'CRON表达式包含无效字符: {part}')
-        
+        # 基本字符验证：预编译正则一次性扫描，避免逐字符 Python 循环
+        bad = _CRON_BAD_RE.search(v)
+        if bad:
+            raise ValueError(f'CRON表达式包含无效字符: {bad.group()}')
+
         return v
     
     @field_validator('timezone')
     @classmethod
     def validate_timezone(cls, v: str) -> str:
         """验证时区格式"""
-        # 检查时区文件是否存在
-        tz_path = Path(f'/usr/share/zoneinfo/{v}')
-        if not tz_path.exists():
+        # 检查时区文件是否存在（结果缓存，相同时区只 stat 一次）
+        if not _tz_exists(v):
             # 在容器中可能不存在，只打印警告
-            print(f"[WARNING] 时区文件不存在: {tz_path}，将使用系统默认时区")
+            print(f"[WARNING] 时区文件不存在: /usr/share/zoneinfo/{v}，将使用系统默认时区")
         return v
 
+    @classmethod
+    def from_env(cls) -> 'D2CConfig':
+        """从环境变量（含 .env 文件）构造配置
+
+        直接按字段别名查 os.environ，替代 BaseSettings 每次实例化
+        都重新扫描环境和 .env 的机制。
+        """
+        values = {}
+        for name, field in cls.model_fields.items():
+            key = field.alias or name
+            if key in os.environ:
+                values[key] = os.environ[key]
+            elif key in _ENV_FILE:
+                values[key] = _ENV_FILE[key]
+        return cls.model_validate(values)
+
+
+# 模块级绑定编译好的 pydantic-core 校验入口，省去每次调用的属性查找链
+_D2C_VALIDATE = D2CConfig.__pydantic_validator__.validate_python
+
+# save() 写入文件时附带的可信标记：带该标记的文件内容来自已校验的配置对象，
+# 重新加载时可用 model_construct 跳过校验器与类型转换（快 10-50 倍）
+_TRUSTED_KEY = '_d2c_trusted'
+
+# 配置文件键名(别名) -> 模型字段名
+_ALIAS_TO_FIELD = {
+    'CRON': 'cron',
+    'NETWORK': 'network',
+    'SHOW_HEALTHCHECK': 'show_healthcheck',
+    'SHOW_CAP_ADD': 'show_cap_add',
+    'SHOW_COMMAND': 'show_command',
+    'SHOW_ENTRYPOINT': 'show_entrypoint',
+    'ENV_FILTER_KEYWORDS': 'env_filter_keywords',
+    'TZ': 'timezone',
+    'OUTPUT_DIR': 'output_dir',
+}
+
+# model_construct 不做类型转换，布尔字段需要手工把 "true"/"false" 转回 bool
+_BOOL_FIELDS = frozenset((
+    'network', 'show_healthcheck', 'show_cap_add', 'show_command', 'show_entrypoint'
+))
+
+
+# 布尔值 -> 配置文件字符串：一次哈希查找，零临时分配
+_BOOL_STR = {True: 'true', False: 'false'}
+
+# save() 输出模板: (配置键, 模型字段名, 格式化函数)，顺序即文件中的顺序
+_SAVE_SCHEMA = (
+    ('CRON', 'cron', str),
+    ('NETWORK', 'network', _BOOL_STR.__getitem__),
+    ('SHOW_HEALTHCHECK', 'show_healthcheck', _BOOL_STR.__getitem__),
+    ('SHOW_CAP_ADD', 'show_cap_add', _BOOL_STR.__getitem__),
+    ('SHOW_COMMAND', 'show_command', _BOOL_STR.__getitem__),
+    ('SHOW_ENTRYPOINT', 'show_entrypoint', _BOOL_STR.__getitem__),
+    ('ENV_FILTER_KEYWORDS', 'env_filter_keywords', str),
+    ('TZ', 'timezone', str),
+)
+
+# 每个配置键对应的注释说明
+_COMMENTS = {
+    'CRON': "定时执行配置: '0 2 * * *'(每天凌晨2点), 'manual'(手动), 'once'(执行一次), 或自定义CRON",
+    'NETWORK': "控制bridge网络配置的显示方式: true(显示) 或 false(隐藏)",
+    'SHOW_HEALTHCHECK': "控制healthcheck配置的显示方式: true(显示) 或 false(隐藏)",
+    'SHOW_CAP_ADD': "控制cap_add配置的显示方式: true(显示) 或 false(隐藏)",
+    'SHOW_COMMAND': "控制command配置的显示方式: true(显示) 或 false(隐藏)",
+    'SHOW_ENTRYPOINT': "控制entrypoint配置的显示方式: true(显示) 或 false(隐藏)",
+    'ENV_FILTER_KEYWORDS': "环境变量过滤关键词，逗号分隔。匹配这些关键词的环境变量将被过滤掉",
+    'TZ': "时区设置,如Asia/Shanghai、Europe/London等",
+}
+
+
+def _construct_trusted(file_data: dict) -> D2CConfig:
+    """从 save() 写入的可信数据直接构造配置对象，跳过校验
+
+    按固定的已知键取值，而不是遍历整个文件字典——注释键既不参与
+    过滤也不被拷贝。
+    """
+    fields = {}
+    for key, field in _ALIAS_TO_FIELD.items():
+        if key not in file_data:
+            continue
+        value = file_data[key]
+        if field in _BOOL_FIELDS and isinstance(value, str):
+            value = value.strip().lower() == 'true'
+        fields[field] = value
+    return D2CConfig.model_construct(**fields)
+
+
+# 变化检测的 stat 缓存时间（秒）：短时间内的重复 load() 不再触发 stat 系统调用
+_STAT_TTL = 0.5
+
 
 class ConfigManager:
     """配置管理器 - 带缓存机制"""
-    
+
     def __init__(self, config_path: str = '/app/config/config.json'):
         self.config_path = Path(config_path)
         self._config: Optional[D2CConfig] = None
-        self._last_modified: float = 0
+        self._last_mtime_ns: int = 0  # 纳秒级 mtime，整数比较避免浮点精度问题
         self._last_size: int = 0
         self._load_count: int = 0
         self._last_log_time: float = 0  # 上次打印日志时间
+        self._last_stat_check: float = 0.0  # 上次 stat 检查时间（monotonic）
+        self._dirty: bool = True  # watchdog 模式下标记文件是否可能有变化
+        self._observer = None
+        # Docker bind mount 上 inotify 事件可能不传播，可通过环境变量关闭
+        if Observer is not None and os.environ.get('D2C_CONFIG_WATCHDOG', 'true').lower() != 'false':
+            self._start_watcher()
     
-    def _is_config_changed(self) -> bool:
-        """检查配置文件是否发生变化"""
-        if not self.config_path.exists():
-            return True
-        
-        stat = self.config_path.stat()
-        return stat.st_mtime != self._last_modified or stat.st_size != self._last_size
-    
-    def _update_cache_info(self):
+    def _start_watcher(self):
+        """启动 watchdog 监听配置目录，失败时退回 stat 轮询"""
+        try:
+            manager = self
+            watched = str(self.config_path)
+
+            class _ConfigEventHandler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if watched in (getattr(event, 'src_path', None),
+                                   getattr(event, 'dest_path', None)):
+                        manager._dirty = True
+
+            observer = Observer()
+            observer.daemon = True
+            observer.schedule(_ConfigEventHandler(), str(self.config_path.parent))
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            _logger().warning(f"启动配置文件监听失败，回退到 stat 轮询: {e}")
+            self._observer = None
+
+    def _stat(self) -> Optional[os.stat_result]:
+        """stat 配置文件，不存在时返回 None"""
+        try:
+            return os.stat(self.config_path)
+        except FileNotFoundError:
+            return None
+
+    def _is_changed(self, st: os.stat_result) -> bool:
+        """根据已有的 stat 结果判断配置文件是否发生变化"""
+        return st.st_mtime_ns != self._last_mtime_ns or st.st_size != self._last_size
+
+    def _update_cache_info(self, st: Optional[os.stat_result] = None):
         """更新缓存信息"""
-        if self.config_path.exists():
-            stat = self.config_path.stat()
-            self._last_modified = stat.st_mtime
-            self._last_size = stat.st_size
+        if st is None:
+            st = self._stat()
+        if st is not None:
+            self._last_mtime_ns = st.st_mtime_ns
+            self._last_size = st.st_size
     
     def load(self, force: bool = False) -> D2CConfig:
         """加载配置，优先从文件读取，带缓存机制"""
         self._load_count += 1
-        
+
+        # watchdog 模式：内核没有上报文件事件时直接返回缓存，零系统调用
+        if not force and self._config is not None and self._observer is not None and not self._dirty:
+            return self._config
+
+        # 短 TTL 内的重复调用直接返回缓存，连 stat 都不做
+        now = time.monotonic()
+        if not force and self._config is not None and now - self._last_stat_check < _STAT_TTL:
+            return self._config
+
+        # 单次 load() 只做一次 stat，后续判断复用结果，避免重复系统调用
+        st = self._stat()
+        if st is not None:
+            self._last_stat_check = now
+
         # 如果配置已缓存且文件未变化，直接返回缓存
-        if not force and self._config is not None and not self._is_config_changed():
+        if not force and self._config is not None and st is not None and not self._is_changed(st):
+            self._dirty = False
             return self._config
-        
+
         # 如果配置文件存在，从文件加载
-        if self.config_path.exists():
+        if st is not None:
             try:
                 # 检查文件是否为空
-                if self.config_path.stat().st_size == 0:
-                    logger.warning(f"配置文件为空: {self.config_path}")
-                    self._config = D2CConfig()
+                if st.st_size == 0:
+                    _logger().warning(f"配置文件为空: {self.config_path}")
+                    self._config = D2CConfig.from_env()
                     self.save(self._config)
                     return self._config
                 
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    file_data = json.load(f)
+                # orjson 要求 bytes 输入，UTF-8 解码在 C 层完成
+                with open(self.config_path, 'rb') as f:
+                    raw = f.read()
+                if orjson:
+                    file_data = orjson.loads(raw)
+                elif msgspec:
+                    file_data = msgspec.json.decode(raw)
+                else:
+                    file_data = json.loads(raw)
                 
                 # 检查是否为字典
                 if not isinstance(file_data, dict):
                     raise ValueError(f"配置文件格式错误: 期望字典，实际为 {type(file_data).__name__}")
                 
-                # 过滤掉注释字段（以 // 开头的键）
-                clean_data = {k: v for k, v in file_data.items() if not k.startswith('//')}
-                
-                # 创建配置对象
-                self._config = D2CConfig.model_validate(clean_data)
-                self._update_cache_info()
+                # 创建配置对象：自己写入的文件按已知键直接取值，
+                # 注释键完全不参与过滤和拷贝；用户手工编辑的走完整校验
+                if file_data.get(_TRUSTED_KEY, False):
+                    self._config = _construct_trusted(file_data)
+                else:
+                    # 过滤注释键（以 // 开头）并驻留键字符串：orjson 返回的是
+                    # 新 str 对象，驻留后字典查找走缓存哈希 + 指针比较的快速路径
+                    clean_data = {sys.intern(k): v for k, v in file_data.items()
+                                  if not k.startswith('//')}
+                    self._config = _D2C_VALIDATE(clean_data)
+                self._update_cache_info(st)
+                self._dirty = False
                 
                 # 限制日志打印频率（至少间隔10秒）
                 current_time = time.time()
                 if current_time - self._last_log_time > 10:
-                    logger.info(f"配置加载成功: CRON={self._config.cron}, NETWORK={self._config.network}")
+                    _logger().info(f"配置加载成功: CRON={self._config.cron}, NETWORK={self._config.network}")
                     self._last_log_time = current_time
                 
                 return self._config
                 
-            except json.JSONDecodeError as e:
-                logger.error(f"配置文件 JSON 解析失败: {e}")
+            except _JSON_DECODE_ERRORS as e:
+                _logger().error(f"配置文件 JSON 解析失败: {e}")
                 # 备份损坏的配置文件
                 backup_path = self.config_path.with_suffix('.json.backup')
                 try:
                     self.config_path.rename(backup_path)
-                    logger.info(f"原文件已备份到: {backup_path}")
+                    _logger().info(f"原文件已备份到: {backup_path}")
                 except Exception as backup_err:
-                    logger.warning(f"备份失败: {backup_err}")
+                    _logger().warning(f"备份失败: {backup_err}")
                 
-                self._config = D2CConfig()
+                self._config = D2CConfig.from_env()
                 self.save(self._config)
                 return self._config
                 
             except Exception as e:
-                logger.warning(f"读取配置文件失败: {e}，使用默认配置")
+                _logger().warning(f"读取配置文件失败: {e}，使用默认配置")
         
         # 从环境变量加载
-        self._config = D2CConfig()
+        self._config = D2CConfig.from_env()
         if self._load_count <= 1:
-            logger.info("使用默认配置")
+            _logger().info("使用默认配置")
         return self._config
     
     def save(self, config: D2CConfig) -> None:
@@ -222,39 +424,36 @@ class ConfigManager:
         # 确保配置目录存在
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
         
-        # 构建带注释的配置数据
-        config_data = {
-            "// 配置说明": "以下是D2C的配置选项",
-            "// CRON": "定时执行配置: '0 2 * * *'(每天凌晨2点), 'manual'(手动), 'once'(执行一次), 或自定义CRON",
-            "CRON": config.cron,
-            "// NETWORK": "控制bridge网络配置的显示方式: true(显示) 或 false(隐藏)",
-            "NETWORK": str(config.network).lower(),
-            "// SHOW_HEALTHCHECK": "控制healthcheck配置的显示方式: true(显示) 或 false(隐藏)",
-            "SHOW_HEALTHCHECK": str(config.show_healthcheck).lower(),
-            "// SHOW_CAP_ADD": "控制cap_add配置的显示方式: true(显示) 或 false(隐藏)",
-            "SHOW_CAP_ADD": str(config.show_cap_add).lower(),
-            "// SHOW_COMMAND": "控制command配置的显示方式: true(显示) 或 false(隐藏)",
-            "SHOW_COMMAND": str(config.show_command).lower(),
-            "// SHOW_ENTRYPOINT": "控制entrypoint配置的显示方式: true(显示) 或 false(隐藏)",
-            "SHOW_ENTRYPOINT": str(config.show_entrypoint).lower(),
-            "// ENV_FILTER_KEYWORDS": "环境变量过滤关键词，逗号分隔。匹配这些关键词的环境变量将被过滤掉",
-            "ENV_FILTER_KEYWORDS": config.env_filter_keywords,
-            "// TZ": "时区设置,如Asia/Shanghai、Europe/London等",
-            "TZ": config.timezone
-        }
-        
-        with open(self.config_path, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=2, ensure_ascii=False)
+        # 按模板构建带注释的配置数据
+        config_data = {"// 配置说明": "以下是D2C的配置选项"}
+        for key, attr, fmt in _SAVE_SCHEMA:
+            config_data[f'// {key}'] = _COMMENTS[key]
+            config_data[key] = fmt(getattr(config, attr))
+        config_data[_TRUSTED_KEY] = True
         
+        # 先写临时文件再原子替换，避免并发 load() 读到半截文件
+        tmp_path = self.config_path.with_suffix('.json.tmp')
+        if orjson:
+            with open(tmp_path, 'wb') as f:
+                f.write(orjson.dumps(config_data, option=orjson.OPT_INDENT_2))
+        else:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(config_data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, self.config_path)
+
+        # 写入后立刻用一次 stat 同步缓存信息：后续 load() 看到的 mtime/size
+        # 与缓存一致，不会把刚写出的文件再解析校验一遍
         self._config = config
-        self._update_cache_info()
-        logger.info(f"配置已保存: {self.config_path}")
+        self._update_cache_info(self._stat())
+        self._dirty = False
+        self._last_stat_check = time.monotonic()
+        _logger().info(f"配置已保存: {self.config_path}")
     
     def ensure_config_file(self) -> D2CConfig:
         """确保配置文件存在，如果不存在则创建默认配置"""
         if not self.config_path.exists():
-            logger.info(f"配置文件不存在，创建默认配置")
-            default_config = D2CConfig()
+            _logger().info(f"配置文件不存在，创建默认配置")
+            default_config = D2CConfig.from_env()
             self.save(default_config)
             return default_config
         
@@ -263,6 +462,8 @@ class ConfigManager:
     def reload(self) -> D2CConfig:
         """重新加载配置"""
         self._config = None
+        self._last_stat_check = 0.0
+        self._dirty = True
         return self.load()
     
     @property
@@ -273,16 +474,10 @@ class ConfigManager:
         return self._config
 
 
-# 全局配置管理器实例
-_config_manager: Optional[ConfigManager] = None
-
-
+@functools.cache
 def get_config_manager(config_path: str = '/app/config/config.json') -> ConfigManager:
-    """获取全局配置管理器实例"""
-    global _config_manager
-    if _config_manager is None:
-        _config_manager = ConfigManager(config_path)
-    return _config_manager
+    """获取全局配置管理器实例（按路径缓存，线程安全）"""
+    return ConfigManager(config_path)
 
 
 def load_config() -> D2CConfig:
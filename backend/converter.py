@@ -5,40 +5,141 @@ Docker 容器到 Compose 配置的转换核心
 """
 
 import re
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from collections import defaultdict
+from dataclasses import dataclass
+from functools import lru_cache
 
 from config import D2CConfig
-from filters import filter_labels, filter_env_vars, should_keep_watchtower_label, parse_env_filter_keywords
+from filters import filter_labels, filter_env_vars, should_keep_watchtower_label, parse_env_filter_keywords, compile_env_filter
 from utils.yaml_utils import dump_compose_config
 
+# 服务名清洗正则：compose 服务名只允许字母、数字、下划线
+_SERVICE_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
 
-def convert_container_to_service(container: Dict[str, Any], 
+# 通配监听地址，端口映射时不需要写出
+_WILDCARD_IPS = frozenset(('0.0.0.0', '::'))
+
+# Docker 默认网络，不作为自定义网络写入 compose
+_DEFAULT_NETWORKS = frozenset(('bridge', 'host', 'none'))
+
+# 分组时单独处理的特殊网络模式
+_SPECIAL_NETWORK_MODES = frozenset(('bridge', 'host'))
+
+
+def _strip_slash(name: str) -> str:
+    """去掉容器名的前导斜杠（单字符前缀用切片，比 lstrip 的逐字符扫描快）"""
+    return name[1:] if name[:1] == '/' else name
+
+
+@lru_cache(maxsize=None)
+def _to_service_name(name: str) -> str:
+    """容器名 -> 服务名（结果缓存，依赖翻译时同名只计算一次）"""
+    return _SERVICE_NAME_RE.sub('_', name)
+
+
+@lru_cache(maxsize=16)
+def _get_env_keywords(filter_string: str):
+    """解析并编译环境变量过滤关键词（按配置字符串缓存，整批转换只编译一次）"""
+    return compile_env_filter(parse_env_filter_keywords(filter_string))
+
+
+@lru_cache(maxsize=256)
+def _ns_to_duration(ns: int) -> str:
+    """纳秒 -> compose 时长字符串（常见取值缓存命中后零开销）"""
+    seconds = ns // 1_000_000_000
+    if seconds >= 3600:
+        return f"{seconds // 3600}h"
+    if seconds >= 60:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+# 健康检查时长字段: (inspect 键, compose 键)
+_HEALTHCHECK_DURATIONS = (
+    ('Interval', 'interval'),
+    ('Timeout', 'timeout'),
+    ('StartPeriod', 'start_period'),
+)
+
+
+@dataclass(slots=True)
+class ContainerView:
+    """docker inspect 结果的扁平视图
+
+    嵌套子字典在构建时解析一次，下游所有转换函数走槽位属性访问，
+    不再重复 .get('HostConfig', {}) 这类链式查找。
+    """
+    id: str
+    name: str
+    host_config: Dict[str, Any]
+    config: Dict[str, Any]
+    network_settings: Dict[str, Any]
+    mounts: List[Dict[str, Any]]
+
+    @classmethod
+    def from_inspect(cls, container: Dict[str, Any]) -> 'ContainerView':
+        return cls(
+            id=container.get('Id', ''),
+            name=_strip_slash(container.get('Name', '')),
+            host_config=container.get('HostConfig') or {},
+            config=container.get('Config') or {},
+            network_settings=container.get('NetworkSettings') or {},
+            mounts=container.get('Mounts') or [],
+        )
+
+
+def _index_containers(containers: List[Dict[str, Any]]) -> Tuple[Dict[str, str], Dict[str, str], Dict[str, str]]:
+    """一次遍历建立容器索引，供分组、依赖分析和服务命名复用
+
+    Returns:
+        (name_to_id, id_to_name, name_to_service_name)
+    """
+    name_to_id: Dict[str, str] = {}
+    id_to_name: Dict[str, str] = {}
+    name_to_service_name: Dict[str, str] = {}
+
+    for container in containers:
+        name = _strip_slash(container.get('Name', ''))
+        container_id = container.get('Id', '')
+        name_to_id[name] = container_id
+        id_to_name[container_id] = name
+        name_to_service_name[name] = _to_service_name(name)
+
+    return name_to_id, id_to_name, name_to_service_name
+
+
+def convert_container_to_service(container: Union[Dict[str, Any], 'ContainerView'],
                                  config: D2CConfig,
                                  networks_info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     将容器配置转换为 docker-compose 服务配置
-    
+
     Args:
-        container: Docker 容器信息字典
+        container: Docker 容器信息字典或 ContainerView
         config: D2C 配置
         networks_info: 网络信息字典
-    
+
     Returns:
         Compose 服务配置字典
     """
+    # 外部调用方仍传原始 inspect 字典，这里统一转为视图
+    view = container if isinstance(container, ContainerView) else ContainerView.from_inspect(container)
+
     service: Dict[str, Any] = {}
-    
+    host_config = view.host_config
+    container_config = view.config
+
     # 获取容器名称
-    container_name = container.get('Name', '').lstrip('/')
+    container_name = view.name
     service['container_name'] = container_name
-    
+
     # 获取镜像
-    image = container.get('Config', {}).get('Image', '')
+    image = container_config.get('Image', '')
     service['image'] = image
-    
+
     # 重启策略
-    restart_policy = container.get('HostConfig', {}).get('RestartPolicy', {})
+    restart_policy = host_config.get('RestartPolicy', {})
     if restart_policy and restart_policy.get('Name'):
         policy_name = restart_policy['Name']
         if policy_name != 'no':
@@ -47,64 +148,46 @@ def convert_container_to_service(container: Dict[str, Any],
             else:
                 service['restart'] = policy_name
     
-    # 端口映射
-    ports = convert_ports(container)
-    if ports:
-        service['ports'] = ports
-    
+    # 端口/卷/链接/设备/安全选项：表驱动抽取（见模块底部 _FIELD_EXTRACTORS）
+    for key, extractor in _FIELD_EXTRACTORS:
+        value = extractor(view)
+        if value:
+            service[key] = value
+
     # 环境变量（过滤系统变量和自定义关键词）
-    env_vars = container.get('Config', {}).get('Env', [])
-    filter_keywords = parse_env_filter_keywords(config.env_filter_keywords)
+    env_vars = container_config.get('Env', [])
+    filter_keywords = _get_env_keywords(config.env_filter_keywords)
     filtered_env = filter_env_vars(env_vars, filter_keywords)
     if filtered_env:
         service['environment'] = filtered_env
-    
-    # 卷挂载
-    volumes = convert_volumes(container)
-    if volumes:
-        service['volumes'] = volumes
-    
+
     # 网络配置
-    network_config = convert_networks(container, config, networks_info)
+    network_config = convert_networks(view, config, networks_info)
     if network_config:
         service.update(network_config)
-    
-    # 链接
-    links = convert_links(container)
-    if links:
-        service['links'] = links
-    
+
     # 特权模式
-    if container.get('HostConfig', {}).get('Privileged'):
+    if host_config.get('Privileged'):
         service['privileged'] = True
-    
-    # 设备挂载
-    devices = convert_devices(container)
-    if devices:
-        service['devices'] = devices
-    
+
     # 标签（过滤系统标签）
-    labels = container.get('Config', {}).get('Labels', {})
+    labels = container_config.get('Labels', {})
     filtered_labels = filter_labels(labels)
     if filtered_labels:
         service['labels'] = filtered_labels
-    
-    # CapAdd（根据配置判断是否显示）
-    if config.show_cap_add:
-        caps = convert_capabilities(container)
-        if caps:
-            service['cap_add'] = caps
-    
-    # Security Opt
-    security_opt = convert_security_options(container)
-    if security_opt:
-        service['security_opt'] = security_opt
-    
+
+    # 受配置开关控制的字段（cap_add / healthcheck）
+    for flag, key, extractor in _CONFIG_GATED_EXTRACTORS:
+        if getattr(config, flag):
+            value = extractor(view)
+            if value:
+                service[key] = value
+
     # 主机名解析
-    extra_hosts = container.get('HostConfig', {}).get('ExtraHosts', [])
+    extra_hosts = host_config.get('ExtraHosts', [])
     if extra_hosts:
         service['extra_hosts'] = extra_hosts
-    
+
     # 时区（如果配置需要）
     tz = config.timezone
     if tz and tz != 'UTC':
@@ -116,31 +199,25 @@ def convert_container_to_service(container: Dict[str, Any],
     
     # Entrypoint（根据配置判断是否显示）
     if config.show_entrypoint:
-        entrypoint = container.get('Config', {}).get('Entrypoint')
+        entrypoint = container_config.get('Entrypoint')
         if entrypoint:
             service['entrypoint'] = entrypoint[0] if len(entrypoint) == 1 else entrypoint
     
     # Command（根据配置判断是否显示）
     if config.show_command:
-        cmd = container.get('Config', {}).get('Cmd')
-        entrypoint = container.get('Config', {}).get('Entrypoint')
+        cmd = container_config.get('Cmd')
+        entrypoint = container_config.get('Entrypoint')
         if cmd and cmd != entrypoint:
             service['command'] = cmd[0] if len(cmd) == 1 else cmd
     
-    # 健康检查（根据配置判断是否显示）
-    if config.show_healthcheck:
-        healthcheck = convert_healthcheck(container)
-        if healthcheck:
-            service['healthcheck'] = healthcheck
-    
     return service
 
 
-def convert_ports(container: Dict[str, Any]) -> List[str]:
+def convert_ports(view: ContainerView) -> List[str]:
     """转换端口映射，自动去重"""
     ports = []
     seen = set()  # 用于去重
-    port_mappings = container.get('NetworkSettings', {}).get('Ports', {})
+    port_mappings = view.network_settings.get('Ports', {})
     
     if not port_mappings:
         return ports
@@ -155,30 +232,34 @@ def convert_ports(container: Dict[str, Any]) -> List[str]:
         for binding in host_bindings:
             host_ip = binding.get('HostIp', '')
             host_port = binding.get('HostPort', '')
-            
+
             if not host_port:
                 continue
-            
-            # 构建端口映射字符串
-            if host_ip and host_ip not in ['0.0.0.0', '::']:
+
+            # 通配地址视作未指定 IP
+            if host_ip in _WILDCARD_IPS:
+                host_ip = ''
+
+            # 先用元组去重，只有首次出现才构建字符串
+            key = (host_ip, host_port, port_proto)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            if host_ip:
                 # 指定了特定 IP
-                port_str = f"{host_ip}:{host_port}:{port_proto}"
+                ports.append(f"{host_ip}:{host_port}:{port_proto}")
             else:
                 # 标准格式
-                port_str = f"{host_port}:{port_proto}"
-            
-            # 去重检查
-            if port_str not in seen:
-                seen.add(port_str)
-                ports.append(port_str)
+                ports.append(f"{host_port}:{port_proto}")
     
     return ports
 
 
-def convert_volumes(container: Dict[str, Any]) -> List[str]:
+def convert_volumes(view: ContainerView) -> List[str]:
     """转换卷挂载"""
     volumes = []
-    mounts = container.get('Mounts', [])
+    mounts = view.mounts
     
     for mount in mounts:
         mount_type = mount.get('Type', '')
@@ -204,14 +285,14 @@ def convert_volumes(container: Dict[str, Any]) -> List[str]:
     return volumes
 
 
-def convert_networks(container: Dict[str, Any], 
+def convert_networks(view: ContainerView,
                      config: D2CConfig,
                      networks_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
     """转换网络配置"""
     result = {}
-    
-    network_mode = container.get('HostConfig', {}).get('NetworkMode', '')
-    networks_config = container.get('NetworkSettings', {}).get('Networks', {})
+
+    network_mode = view.host_config.get('NetworkMode', '')
+    networks_config = view.network_settings.get('Networks', {})
     
     # 特殊网络模式
     if network_mode == 'host':
@@ -222,8 +303,9 @@ def convert_networks(container: Dict[str, Any],
         result['network_mode'] = 'none'
         return result
     
-    if network_mode.startswith('container:'):
-        linked_container = network_mode.split(':')[1]
+    if network_mode[:10] == 'container:':
+        # partition 一次 C 调用取出冒号后的部分，不分配 split 列表
+        linked_container = network_mode.partition(':')[2]
         result['network_mode'] = f"container:{linked_container}"
         return result
     
@@ -232,44 +314,44 @@ def convert_networks(container: Dict[str, Any],
             result['network_mode'] = 'bridge'
         return result
     
+    # 没有网络信息时直接返回，跳过循环和字典分配
+    if not networks_config:
+        return result
+
     # 自定义网络
     custom_networks = {}
-    
+
     for network_name, network_config in networks_config.items():
         # 跳过默认网络
-        if network_name in ['bridge', 'host', 'none']:
+        if network_name in _DEFAULT_NETWORKS:
             continue
-        
+
         # 检查网络驱动
         driver = ''
         if networks_info and network_name in networks_info:
             driver = networks_info[network_name].get('Driver', '')
-        
+
         # 构建网络配置
         net_settings = {}
-        
-        # IPv4 地址
-        ipam = network_config.get('IPAMConfig', {})
-        if ipam and ipam.get('IPv4Address'):
-            net_settings['ipv4_address'] = ipam['IPv4Address']
-        elif network_config.get('IPAddress'):
-            net_settings['ipv4_address'] = network_config['IPAddress']
-        
+        ipam = network_config.get('IPAMConfig') or {}
+
+        # IPv4 地址（优先 IPAM 静态配置）
+        ipv4 = ipam.get('IPv4Address') or network_config.get('IPAddress')
+        if ipv4:
+            net_settings['ipv4_address'] = ipv4
+
         # IPv6 地址
-        if ipam and ipam.get('IPv6Address'):
-            net_settings['ipv6_address'] = ipam['IPv6Address']
-        elif network_config.get('GlobalIPv6Address'):
-            net_settings['ipv6_address'] = network_config['GlobalIPv6Address']
-        
+        ipv6 = ipam.get('IPv6Address') or network_config.get('GlobalIPv6Address')
+        if ipv6:
+            net_settings['ipv6_address'] = ipv6
+
         # MAC 地址
-        if network_config.get('MacAddress'):
-            net_settings['mac_address'] = network_config['MacAddress']
-        
+        mac = network_config.get('MacAddress')
+        if mac:
+            net_settings['mac_address'] = mac
+
         # 存储网络配置
-        if net_settings:
-            custom_networks[network_name] = net_settings
-        else:
-            custom_networks[network_name] = None
+        custom_networks[network_name] = net_settings or None
     
     if custom_networks:
         # 简化格式：如果所有网络都没有特殊配置，使用列表格式
@@ -285,28 +367,28 @@ def convert_networks(container: Dict[str, Any],
     return result
 
 
-def convert_links(container: Dict[str, Any]) -> List[str]:
+def convert_links(view: ContainerView) -> List[str]:
     """转换容器链接"""
     links = []
-    raw_links = container.get('HostConfig', {}).get('Links', [])
+    raw_links = view.host_config.get('Links', [])
     
     for link in raw_links or []:
         # 链接格式: /container_name:/alias
         parts = link.split(':')
         if len(parts) >= 2:
-            container_name = parts[0].lstrip('/')
-            alias = parts[1].lstrip('/')
+            container_name = _strip_slash(parts[0])
+            alias = _strip_slash(parts[1])
             links.append(f"{container_name}:{alias}")
         else:
-            links.append(link.lstrip('/'))
+            links.append(_strip_slash(link))
     
     return links
 
 
-def convert_devices(container: Dict[str, Any]) -> List[str]:
+def convert_devices(view: ContainerView) -> List[str]:
     """转换设备挂载"""
     devices = []
-    raw_devices = container.get('HostConfig', {}).get('Devices', [])
+    raw_devices = view.host_config.get('Devices', [])
     
     for device in raw_devices or []:
         host_path = device.get('PathOnHost', '')
@@ -319,45 +401,34 @@ def convert_devices(container: Dict[str, Any]) -> List[str]:
     return devices
 
 
-def convert_capabilities(container: Dict[str, Any]) -> List[str]:
+def convert_capabilities(view: ContainerView) -> List[str]:
     """转换能力配置"""
-    caps = []
-    cap_add = container.get('HostConfig', {}).get('CapAdd', [])
-    
     # 只保留用户添加的能力，不自动添加
-    for cap in cap_add or []:
-        caps.append(cap)
-    
-    return caps
+    return list(view.host_config.get('CapAdd') or [])
 
 
-def convert_security_options(container: Dict[str, Any]) -> List[str]:
+def convert_security_options(view: ContainerView) -> List[str]:
     """转换安全选项"""
     security_opt = []
-    
+    host_config = view.host_config
+
+    cap_add = host_config.get('CapAdd', [])
+    existing_opts = host_config.get('SecurityOpt') or []
+
     # 检查是否需要 apparmor unconfined
-    cap_add = container.get('HostConfig', {}).get('CapAdd', [])
-    
     if cap_add and ('SYS_ADMIN' in cap_add or 'NET_ADMIN' in cap_add):
-        # 检查是否已经有 apparmor 设置
-        existing_opts = container.get('HostConfig', {}).get('SecurityOpt', [])
-        has_apparmor = any('apparmor' in opt for opt in existing_opts or [])
-        
-        if not has_apparmor:
+        if not any(opt.startswith('apparmor') for opt in existing_opts):
             security_opt.append('apparmor:unconfined')
-    
-    # 添加其他安全选项
-    existing_opts = container.get('HostConfig', {}).get('SecurityOpt', [])
-    for opt in existing_opts or []:
-        if opt not in security_opt:
-            security_opt.append(opt)
-    
+
+    # 添加其他安全选项（dict.fromkeys 去重且保持顺序）
+    security_opt.extend(dict.fromkeys(existing_opts))
+
     return security_opt
 
 
-def convert_healthcheck(container: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def convert_healthcheck(view: ContainerView) -> Optional[Dict[str, Any]]:
     """转换健康检查配置"""
-    health_config = container.get('Config', {}).get('Healthcheck')
+    health_config = view.config.get('Healthcheck')
     
     if not health_config:
         return None
@@ -380,30 +451,12 @@ def convert_healthcheck(container: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         else:
             healthcheck['test'] = test
     
-    # 时间间隔转换（纳秒到秒）
-    def ns_to_duration(ns: Optional[int]) -> Optional[str]:
-        if ns is None:
-            return None
-        seconds = ns // 1_000_000_000
-        if seconds < 60:
-            return f"{seconds}s"
-        elif seconds < 3600:
-            return f"{seconds // 60}m"
-        else:
-            return f"{seconds // 3600}h"
-    
-    interval = health_config.get('Interval')
-    if interval:
-        healthcheck['interval'] = ns_to_duration(interval)
-    
-    timeout = health_config.get('Timeout')
-    if timeout:
-        healthcheck['timeout'] = ns_to_duration(timeout)
-    
-    start_period = health_config.get('StartPeriod')
-    if start_period:
-        healthcheck['start_period'] = ns_to_duration(start_period)
-    
+    # 时间间隔转换（纳秒到秒），模块级函数表驱动
+    for key_in, key_out in _HEALTHCHECK_DURATIONS:
+        value = health_config.get(key_in)
+        if value:
+            healthcheck[key_out] = _ns_to_duration(value)
+
     retries = health_config.get('Retries')
     if retries:
         healthcheck['retries'] = retries
@@ -415,49 +468,80 @@ def convert_healthcheck(container: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     return healthcheck if healthcheck else None
 
 
-def analyze_container_dependencies(containers: List[Dict[str, Any]]) -> Dict[str, List[str]]:
+# 无条件字段抽取流水线: (compose 键, 抽取函数)，convert_container_to_service 按序执行
+_FIELD_EXTRACTORS = (
+    ('ports', convert_ports),
+    ('volumes', convert_volumes),
+    ('links', convert_links),
+    ('devices', convert_devices),
+    ('security_opt', convert_security_options),
+)
+
+# 受配置开关控制的字段: (配置属性, compose 键, 抽取函数)
+_CONFIG_GATED_EXTRACTORS = (
+    ('show_cap_add', 'cap_add', convert_capabilities),
+    ('show_healthcheck', 'healthcheck', convert_healthcheck),
+)
+
+
+def analyze_container_dependencies(containers: List[Dict[str, Any]],
+                                   name_to_id: Optional[Dict[str, str]] = None) -> Dict[str, List[str]]:
     """
     分析容器间的依赖关系
-    
+
+    Args:
+        containers: 容器列表
+        name_to_id: 可选的容器名索引（来自 _index_containers），不传则现场构建
+
     Returns:
         容器名称到依赖列表的映射
     """
     dependencies = {}
-    container_names = {c.get('Name', '').lstrip('/') for c in containers}
+    if name_to_id is None:
+        name_to_id = {_strip_slash(c.get('Name', '')): c.get('Id', '') for c in containers}
+    container_names = name_to_id
     
     for container in containers:
-        name = container.get('Name', '').lstrip('/')
-        deps = set()
-        
+        name = _strip_slash(container.get('Name', ''))
+        host_config = container.get('HostConfig') or {}
+        # 多数容器没有依赖，集合按需创建
+        deps = None
+
         # 从 Links 分析
-        links = container.get('HostConfig', {}).get('Links', [])
+        links = host_config.get('Links', [])
         for link in links or []:
-            linked_name = link.split(':')[0].lstrip('/')
+            linked_name = _strip_slash(link.split(':')[0])
             if linked_name in container_names and linked_name != name:
+                if deps is None:
+                    deps = set()
                 deps.add(linked_name)
-        
+
         # 从网络模式分析
-        network_mode = container.get('HostConfig', {}).get('NetworkMode', '')
+        network_mode = host_config.get('NetworkMode', '')
         if network_mode.startswith('container:'):
-            dep_name = network_mode.split(':')[1]
+            dep_name = network_mode.partition(':')[2]
             if dep_name in container_names:
+                if deps is None:
+                    deps = set()
                 deps.add(dep_name)
-        
+
         if deps:
-            dependencies[name] = sorted(list(deps))
+            dependencies[name] = sorted(deps)
     
     return dependencies
 
 
-def group_containers_by_network(containers: List[Dict[str, Any]], 
-                                 networks: Dict[str, Any]) -> List[List[str]]:
+def group_containers_by_network(containers: List[Dict[str, Any]],
+                                 networks: Dict[str, Any],
+                                 name_to_id: Optional[Dict[str, str]] = None) -> List[List[str]]:
     """
     根据网络关系对容器进行分组
-    
+
     Args:
         containers: 容器列表
         networks: 网络信息
-    
+        name_to_id: 可选的容器名索引（来自 _index_containers），不传则现场构建
+
     Returns:
         容器 ID 分组列表
     """
@@ -469,91 +553,93 @@ def group_containers_by_network(containers: List[Dict[str, Any]],
     # 收集每个容器的网络信息
     for container in containers:
         container_id = container.get('Id', '')
-        container_name = container.get('Name', '').lstrip('/')
-        network_mode = container.get('HostConfig', {}).get('NetworkMode', '')
-        
+        container_name = _strip_slash(container.get('Name', ''))
+        host_config = container.get('HostConfig') or {}
+        network_mode = host_config.get('NetworkMode', '')
+
         # 特殊网络模式（host, bridge）单独处理
-        if network_mode in ['bridge', 'host']:
+        if network_mode in _SPECIAL_NETWORK_MODES:
             special_network_containers.append(container_id)
             continue
-        
+
         # 收集自定义网络
-        container_networks = container.get('NetworkSettings', {}).get('Networks', {})
+        container_networks = (container.get('NetworkSettings') or {}).get('Networks', {})
         for network_name in container_networks.keys():
-            if network_name not in ['bridge', 'host', 'none']:
+            if network_name not in _DEFAULT_NETWORKS:
                 network_groups[network_name].append(container_id)
-        
+
         # 收集链接
-        links = container.get('HostConfig', {}).get('Links', [])
+        links = host_config.get('Links', [])
         for link in links or []:
-            linked_name = link.split(':')[0].lstrip('/')
+            linked_name = _strip_slash(link.split(':')[0])
             container_links[container_id].append(linked_name)
     
-    # 合并有共同网络的容器组
-    merged_groups = []
-    processed_networks = set()
-    
-    for network_name, container_ids in network_groups.items():
-        if network_name in processed_networks:
-            continue
-        
-        group = set(container_ids)
-        processed_networks.add(network_name)
-        
-        # 查找有重叠容器的其他网络
-        for other_network, other_ids in network_groups.items():
-            if other_network not in processed_networks:
-                if any(cid in group for cid in other_ids):
-                    group.update(other_ids)
-                    processed_networks.add(other_network)
-        
-        merged_groups.append(list(group))
-    
+    # 容器名 -> ID 映射：链接解析用 O(1) 查找代替每条链接扫描全表
+    if name_to_id is None:
+        name_to_id = {_strip_slash(c.get('Name', '')): c.get('Id', '') for c in containers}
+
+    # 并查集：共享网络或链接的容器合并到同一集合，一次线性扫描完成合并，
+    # 代替原先对每个网络扫描其余所有网络找重叠的二次方逻辑
+    parent: Dict[str, str] = {}
+
+    def find(x: str) -> str:
+        root = x
+        while parent[root] != root:
+            root = parent[root]
+        # 路径压缩
+        while parent[x] != root:
+            parent[x], x = root, parent[x]
+        return root
+
+    def union(a: str, b: str) -> None:
+        if a not in parent:
+            parent[a] = a
+        if b not in parent:
+            parent[b] = b
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[root_b] = root_a
+
+    # 同一自定义网络中的容器互相合并（各自与首个容器合并即可）
+    for container_ids in network_groups.values():
+        first = container_ids[0]
+        if first not in parent:
+            parent[first] = first
+        for cid in container_ids[1:]:
+            union(first, cid)
+
     # 处理通过链接连接的容器
     for container_id, linked_names in container_links.items():
-        # 检查容器是否已经在某个组中
-        existing_group_idx = None
-        for i, group in enumerate(merged_groups):
-            if container_id in group:
-                existing_group_idx = i
-                break
-        
-        # 查找链接的容器 ID
-        linked_ids = set()
+        if container_id not in parent:
+            parent[container_id] = container_id
         for name in linked_names:
-            for c in containers:
-                if c.get('Name', '').lstrip('/') == name:
-                    linked_ids.add(c.get('Id', ''))
-        
-        if existing_group_idx is not None:
-            # 添加到现有组
-            merged_groups[existing_group_idx] = list(
-                set(merged_groups[existing_group_idx]) | linked_ids
-            )
-        else:
-            # 创建新组
-            new_group = {container_id} | linked_ids
-            merged_groups.append(list(new_group))
-    
-    # 处理剩余未分组的容器
-    grouped_ids = set()
-    for group in merged_groups:
-        grouped_ids.update(group)
-    
+            linked_id = name_to_id.get(name)
+            if linked_id:
+                union(container_id, linked_id)
+
+    # 按根节点分桶，每个连通分量即一个容器组
+    buckets: Dict[str, List[str]] = defaultdict(list)
+    for cid in parent:
+        buckets[find(cid)].append(cid)
+
+    # 处理剩余未分组的容器（parent 的键即全部已分组容器）
+    special_ids = set(special_network_containers)
     standalone = [
-        c.get('Id', '') for c in containers 
-        if c.get('Id', '') not in grouped_ids 
-        and c.get('Id', '') not in special_network_containers
+        c.get('Id', '') for c in containers
+        if c.get('Id', '') not in parent
+        and c.get('Id', '') not in special_ids
     ]
-    
+
+    result = list(buckets.values())
+
     if standalone:
-        merged_groups.append(standalone)
-    
+        result.append(standalone)
+
     # 添加特殊网络容器（每个单独一组）
     for container_id in special_network_containers:
-        merged_groups.append([container_id])
-    
-    return merged_groups
+        result.append([container_id])
+
+    return result
 
 
 def generate_compose_config(containers: List[Dict[str, Any]],
@@ -571,43 +657,42 @@ def generate_compose_config(containers: List[Dict[str, Any]],
         Compose 配置字典
     """
     if config is None:
-        config = D2CConfig()
+        config = D2CConfig.from_env()
     
     # 不再添加已废弃的 version 字段
     compose = {
         'services': {},
     }
     
-    # 转换每个容器为服务
+    # 名称/ID 索引只建一次，服务命名、依赖分析共用
+    name_to_id, _id_to_name, name_to_service_name = _index_containers(containers)
+
+    # 转换每个容器为服务，同一趟顺便收集使用到的自定义网络
+    # 视图只构建一次，转换和网络收集共用
+    used_networks = set()
     for container in containers:
-        container_name = container.get('Name', '').lstrip('/')
-        service_name = re.sub(r'[^a-zA-Z0-9_]', '_', container_name)
-        
-        service = convert_container_to_service(container, config, networks)
+        view = ContainerView.from_inspect(container)
+        service_name = name_to_service_name[view.name]
+
+        service = convert_container_to_service(view, config, networks)
         compose['services'][service_name] = service
+
+        for network_name in view.network_settings.get('Networks', {}):
+            if network_name not in _DEFAULT_NETWORKS:
+                used_networks.add(network_name)
     
     # 分析依赖关系并添加 depends_on
-    dependencies = analyze_container_dependencies(containers)
+    dependencies = analyze_container_dependencies(containers, name_to_id)
     if dependencies:
         for service_name, service in compose['services'].items():
             container_name = service.get('container_name', '')
             if container_name in dependencies:
                 deps = dependencies[container_name]
-                # 转换为服务名
-                dep_services = [
-                    re.sub(r'[^a-zA-Z0-9_]', '_', d) 
-                    for d in deps
-                ]
+                # 转换为服务名（索引中已有的直接复用）
+                dep_services = [name_to_service_name.get(d) or _to_service_name(d)
+                                for d in deps]
                 service['depends_on'] = dep_services
     
-    # 收集使用的网络
-    used_networks = set()
-    for container in containers:
-        container_networks = container.get('NetworkSettings', {}).get('Networks', {})
-        for network_name in container_networks.keys():
-            if network_name not in ['bridge', 'host', 'none']:
-                used_networks.add(network_name)
-    
     # 添加网络配置
     if used_networks:
         compose['networks'] = {}
@@ -629,7 +714,7 @@ if __name__ == '__main__':
     
     containers = get_containers()
     networks = get_networks()
-    config = D2CConfig()
+    config = D2CConfig.from_env()
     
     if containers:
         print(f"\n找到 {len(containers)} 个容器")
@@ -638,7 +723,7 @@ if __name__ == '__main__':
         test_container = containers[0]
         service = convert_container_to_service(test_container, config, networks)
         
-        print(f"\n容器 '{test_container.get('Name', '').lstrip('/')}' 的服务配置:")
+        print(f"\n容器 '{service['container_name']}' 的服务配置:")
         import json
         print(json.dumps(service, indent=2, ensure_ascii=False))
     
@@ -1,306 +1,422 @@
-#!/usr/bin/env python3
-"""
-D2C Filters Module
-用于过滤系统标签、环境变量等
-"""
-
-from typing import Dict, List, Optional, Set
-
-
-# 系统标签前缀黑名单 - 这些前缀的标签将被过滤掉
-SYSTEM_LABEL_PREFIXES: List[str] = [
-    # Open Containers Initiative 标准标签
-    'org.opencontainers.image.',
-    'org.opencontainers.',
-    
-    # Label Schema 标准（已废弃但仍广泛使用）
-    'org.label-schema.',
-    
-    # Docker 官方标签
-    'com.docker.',
-    'io.docker.',
-    
-    # 构建相关
-    'build-date',
-    'vcs-ref',
-    'vcs-type',
-    'vcs-url',
-    
-    # 其他常见系统标签
-    'maintainer',  # 已弃用，改用 LABEL maintainer="..."
-]
-
-# 精确匹配的系统标签黑名单
-SYSTEM_LABELS_EXACT: Set[str] = {
-    # Docker Compose 生成的标签
-    'com.docker.compose.container-number',
-    'com.docker.compose.service',
-    'com.docker.compose.project',
-    'com.docker.compose.version',
-    'com.docker.compose.config-hash',
-    'com.docker.compose.project.config_files',
-    'com.docker.compose.project.working_dir',
-    'com.docker.compose.oneoff',
-    'com.docker.compose.image',
-    
-    # 其他 Docker 内部标签
-    'desktop.docker.io/binds/0/Source',
-    'desktop.docker.io/binds/0/Target',
-}
-
-# 用户可能想保留的标签白名单（即使匹配系统前缀）
-USER_LABEL_WHITELIST: Set[str] = set()
-
-# 环境变量黑名单
-ENV_VAR_BLACKLIST: Set[str] = {
-    'PATH',
-    'HOSTNAME',
-    'HOME',
-    'USER',
-    'TERM',
-    'LANG',
-    'LANGUAGE',
-    'LC_ALL',
-    'PWD',
-    'OLDPWD',
-    'SHLVL',
-    '_',  # 上一条命令
-    
-    # Docker 相关环境变量
-    'DOCKER_HOST',
-    'DOCKER_TLS_VERIFY',
-    'DOCKER_CERT_PATH',
-    
-    # Python 相关
-    'PYTHONPATH',
-    'PYTHON_VERSION',
-    'PYTHON_PIP_VERSION',
-    'PYTHON_GET_PIP_URL',
-    'PYTHON_GET_PIP_SHA256',
-    
-    # 其他常见系统环境变量
-    'DEBIAN_FRONTEND',
-    'GPG_KEY',
-}
-
-# 环境变量前缀黑名单
-ENV_VAR_PREFIX_BLACKLIST: List[str] = [
-    'APPDIR_',
-    'APP_NAME_',
-]
-
-# 默认环境变量关键词黑名单（用于动态过滤）
-DEFAULT_ENV_VAR_KEYWORDS: List[str] = [
-    'VERSION',
-    'YARN_VERSION',
-    'NODE_VERSION',
-    'APP_VERSION',
-    'NPM_VERSION',
-    'PYTHON_VERSION',
-    'PIP_VERSION',
-    'RUBY_VERSION',
-    'GEM_VERSION',
-    'GO_VERSION',
-    'RUST_VERSION',
-    'JAVA_VERSION',
-    'GRADLE_VERSION',
-    'MAVEN_VERSION',
-    'PHP_VERSION',
-    'COMPOSER_VERSION',
-]
-
-
-def should_keep_label(key: str, value: str = '') -> bool:
-    """
-    判断是否应该保留标签
-    
-    Args:
-        key: 标签键名
-        value: 标签值（用于未来可能的值过滤）
-    
-    Returns:
-        bool: 是否保留该标签
-    """
-    # 如果标签在白名单中，直接保留
-    if key in USER_LABEL_WHITELIST:
-        return True
-    
-    # 如果标签在精确匹配黑名单中，过滤掉
-    if key in SYSTEM_LABELS_EXACT:
-        return False
-    
-    # 检查是否匹配系统前缀黑名单
-    for prefix in SYSTEM_LABEL_PREFIXES:
-        if key.startswith(prefix):
-            return False
-    
-    # 其他标签保留
-    return True
-
-
-def filter_labels(labels: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
-    """
-    过滤容器标签，移除系统标签
-    
-    Args:
-        labels: 原始标签字典
-    
-    Returns:
-        过滤后的标签字典，如果没有有效标签则返回 None
-    """
-    if not labels:
-        return None
-    
-    filtered = {
-        k: v for k, v in labels.items() 
-        if should_keep_label(k, v)
-    }
-    
-    return filtered if filtered else None
-
-
-def should_keep_env_var(key: str, filter_keywords: List[str] = None) -> bool:
-    """
-    判断是否应该保留环境变量
-    
-    Args:
-        key: 环境变量名
-        filter_keywords: 额外的过滤关键词列表
-    
-    Returns:
-        bool: 是否保留该环境变量
-    """
-    # 如果在黑名单中，过滤掉
-    if key in ENV_VAR_BLACKLIST:
-        return False
-    
-    # 检查前缀黑名单
-    for prefix in ENV_VAR_PREFIX_BLACKLIST:
-        if key.startswith(prefix):
-            return False
-    
-    # 检查动态过滤关键词
-    if filter_keywords:
-        for keyword in filter_keywords:
-            keyword = keyword.strip()
-            if keyword and keyword in key:
-                return False
-    
-    return True
-
-
-def filter_env_vars(env_vars: Optional[List[str]], 
-                    filter_keywords: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
-    """
-    过滤环境变量，移除系统环境变量
-    
-    Args:
-        env_vars: 环境变量列表，格式为 ['KEY=value', ...]
-        filter_keywords: 额外的过滤关键词列表
-    
-    Returns:
-        过滤后的环境变量字典，如果没有有效变量则返回 None
-    """
-    if not env_vars:
-        return None
-    
-    filtered = {}
-    for env_var in env_vars:
-        if '=' not in env_var:
-            continue
-        
-        key, value = env_var.split('=', 1)
-        
-        if should_keep_env_var(key, filter_keywords):
-            filtered[key] = value
-    
-    return filtered if filtered else None
-
-
-def parse_env_filter_keywords(filter_string: Optional[str]) -> List[str]:
-    """
-    解析环境变量过滤关键词字符串
-    
-    Args:
-        filter_string: 逗号分隔的过滤关键词字符串
-    
-    Returns:
-        过滤关键词列表
-    """
-    if not filter_string:
-        return []
-    
-    # 按逗号分割并清理
-    keywords = [kw.strip() for kw in filter_string.split(',') if kw.strip()]
-    return keywords
-
-
-def get_label_filter_stats(original: Optional[Dict[str, str]], 
-                           filtered: Optional[Dict[str, str]]) -> Dict[str, int]:
-    """
-    获取标签过滤统计信息
-    
-    Args:
-        original: 原始标签
-        filtered: 过滤后的标签
-    
-    Returns:
-        统计信息字典
-    """
-    original_count = len(original) if original else 0
-    filtered_count = len(filtered) if filtered else 0
-    
-    return {
-        'original_count': original_count,
-        'filtered_count': filtered_count,
-        'removed_count': original_count - filtered_count,
-        'removed_ratio': f"{((original_count - filtered_count) / original_count * 100):.1f}%" if original_count > 0 else "0%"
-    }
-
-
-# Watchtower 标签（用户通常希望保留）
-WATCHTOWER_LABELS: Set[str] = {
-    'com.centurylinklabs.watchtower.enable',
-    'com.centurylinklabs.watchtower.monitor-only',
-}
-
-
-def should_keep_watchtower_label(key: str) -> bool:
-    """判断是否是需要保留的 Watchtower 标签"""
-    return key in WATCHTOWER_LABELS or key.startswith('com.centurylinklabs.watchtower.')
-
-
-if __name__ == '__main__':
-    # 测试过滤器
-    test_labels = {
-        'com.docker.compose.project': 'myproject',
-        'com.docker.compose.service': 'web',
-        'org.opencontainers.image.title': 'My App',
-        'org.label-schema.name': 'My App',
-        'maintainer': 'test@example.com',
-        'my.custom.label': 'value',
-        'com.centurylinklabs.watchtower.enable': 'true',
-        'app.version': '1.0.0',
-    }
-    
-    filtered = filter_labels(test_labels)
-    stats = get_label_filter_stats(test_labels, filtered)
-    
-    print("标签过滤测试:")
-    print(f"  原始标签: {len(test_labels)} 个")
-    print(f"  过滤后: {len(filtered)} 个")
-    print(f"  移除: {stats['removed_count']} 个 ({stats['removed_ratio']})")
-    print(f"  保留的标签: {filtered}")
-    
-    test_env = [
-        'PATH=/usr/bin',
-        'HOME=/root',
-        'MY_APP_KEY=secret',
-        'DATABASE_URL=postgres://localhost',
-    ]
-    
-    filtered_env = filter_env_vars(test_env)
-    print("\n环境变量过滤测试:")
-    print(f"  原始环境变量: {len(test_env)} 个")
-    print(f"  过滤后: {len(filtered_env)} 个")
-    print(f"  保留的环境变量: {filtered_env}")
+#!/usr/bin/env python3
+"""
+D2C Filters Module
+用于过滤系统标签、环境变量等
+"""
+
+import re
+import sys
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Pattern, Tuple, Union
+
+
+# 系统标签前缀黑名单 - 这些前缀的标签将被过滤掉
+SYSTEM_LABEL_PREFIXES: List[str] = [
+    # Open Containers Initiative 标准标签
+    'org.opencontainers.image.',
+    'org.opencontainers.',
+    
+    # Label Schema 标准（已废弃但仍广泛使用）
+    'org.label-schema.',
+    
+    # Docker 官方标签
+    'com.docker.',
+    'io.docker.',
+    
+    # 构建相关
+    'build-date',
+    'vcs-ref',
+    'vcs-type',
+    'vcs-url',
+    
+    # 其他常见系统标签
+    'maintainer',  # 已弃用，改用 LABEL maintainer="..."
+]
+
+# 精确匹配的系统标签黑名单
+SYSTEM_LABELS_EXACT: FrozenSet[str] = frozenset({
+    # Docker Compose 生成的标签
+    'com.docker.compose.container-number',
+    'com.docker.compose.service',
+    'com.docker.compose.project',
+    'com.docker.compose.version',
+    'com.docker.compose.config-hash',
+    'com.docker.compose.project.config_files',
+    'com.docker.compose.project.working_dir',
+    'com.docker.compose.oneoff',
+    'com.docker.compose.image',
+    
+    # 其他 Docker 内部标签
+    'desktop.docker.io/binds/0/Source',
+    'desktop.docker.io/binds/0/Target',
+})
+
+# 用户可能想保留的标签白名单（即使匹配系统前缀）
+USER_LABEL_WHITELIST: FrozenSet[str] = frozenset()
+
+# 环境变量黑名单
+ENV_VAR_BLACKLIST: FrozenSet[str] = frozenset({
+    'PATH',
+    'HOSTNAME',
+    'HOME',
+    'USER',
+    'TERM',
+    'LANG',
+    'LANGUAGE',
+    'LC_ALL',
+    'PWD',
+    'OLDPWD',
+    'SHLVL',
+    '_',  # 上一条命令
+    
+    # Docker 相关环境变量
+    'DOCKER_HOST',
+    'DOCKER_TLS_VERIFY',
+    'DOCKER_CERT_PATH',
+    
+    # Python 相关
+    'PYTHONPATH',
+    'PYTHON_VERSION',
+    'PYTHON_PIP_VERSION',
+    'PYTHON_GET_PIP_URL',
+    'PYTHON_GET_PIP_SHA256',
+    
+    # 其他常见系统环境变量
+    'DEBIAN_FRONTEND',
+    'GPG_KEY',
+})
+
+# 环境变量前缀黑名单
+ENV_VAR_PREFIX_BLACKLIST: List[str] = [
+    'APPDIR_',
+    'APP_NAME_',
+]
+
+# 默认环境变量关键词黑名单（用于动态过滤）
+DEFAULT_ENV_VAR_KEYWORDS: List[str] = [
+    'VERSION',
+    'YARN_VERSION',
+    'NODE_VERSION',
+    'APP_VERSION',
+    'NPM_VERSION',
+    'PYTHON_VERSION',
+    'PIP_VERSION',
+    'RUBY_VERSION',
+    'GEM_VERSION',
+    'GO_VERSION',
+    'RUST_VERSION',
+    'JAVA_VERSION',
+    'GRADLE_VERSION',
+    'MAVEN_VERSION',
+    'PHP_VERSION',
+    'COMPOSER_VERSION',
+]
+
+
+# str.startswith原生接受前缀元组，整个黑名单一次C调用完成匹配；
+# 对应前缀列表导入后不应再修改
+_SYSTEM_LABEL_PREFIXES = tuple(SYSTEM_LABEL_PREFIXES)
+_ENV_VAR_PREFIXES = tuple(ENV_VAR_PREFIX_BLACKLIST)
+
+# 精确黑名单成员导入时intern：与intern过的查询键比较时先走指针相等，
+# 免去逐字符比较
+SYSTEM_LABELS_EXACT = frozenset(map(sys.intern, SYSTEM_LABELS_EXACT))
+ENV_VAR_BLACKLIST = frozenset(map(sys.intern, ENV_VAR_BLACKLIST))
+
+
+@lru_cache(maxsize=4096)
+def _should_keep_label_key(key: str) -> bool:
+    """标签键的保留判定（纯函数，按键名缓存）"""
+    # 如果标签在白名单中，直接保留
+    if key in USER_LABEL_WHITELIST:
+        return True
+
+    # 如果标签在精确匹配黑名单中，过滤掉
+    if key in SYSTEM_LABELS_EXACT:
+        return False
+
+    # 检查是否匹配系统前缀黑名单（元组形式一次C调用）
+    if key.startswith(_SYSTEM_LABEL_PREFIXES):
+        return False
+
+    # 其他标签保留
+    return True
+
+
+def should_keep_label(key: str, value: str = '') -> bool:
+    """
+    判断是否应该保留标签
+
+    同样的标签键（com.docker.compose.* 等）在每个容器上重复出现，
+    判定结果只取决于键名，走 lru_cache。
+
+    Args:
+        key: 标签键名
+        value: 标签值（用于未来可能的值过滤）
+
+    Returns:
+        bool: 是否保留该标签
+    """
+    return _should_keep_label_key(key)
+
+
+def iter_filtered_labels(labels: Optional[Dict[str, str]]) -> Iterator[Tuple[str, str]]:
+    """
+    惰性迭代保留下来的标签键值对
+
+    不构建中间字典，消费方（dict()、YAML 序列化等）可以直接接收。
+
+    Args:
+        labels: 原始标签字典
+
+    Yields:
+        (键, 值) 元组
+    """
+    if not labels:
+        return
+    keep = _should_keep_label_key  # 局部绑定，循环内免去全局查找
+    intern = sys.intern
+    for k, v in labels.items():
+        # 同样的标签键在每个容器上重复出现，intern后各容器共享一份
+        # 字符串对象，后续字典/集合查找退化为指针比较
+        if keep(k):
+            yield intern(k), v
+
+
+def filter_labels(labels: Optional[Dict[str, str]]) -> Optional[Dict[str, str]]:
+    """
+    过滤容器标签，移除系统标签
+
+    compose 输出需要映射类型，所以这里把 iter_filtered_labels
+    物化成字典；只需要遍历一遍的场景直接用迭代器版本。
+
+    Args:
+        labels: 原始标签字典
+
+    Returns:
+        过滤后的标签字典，如果没有有效标签则返回 None
+    """
+    filtered = dict(iter_filtered_labels(labels))
+    return filtered if filtered else None
+
+
+def has_user_labels(labels: Optional[Dict[str, str]]) -> bool:
+    """
+    判断是否存在任何会被保留的标签
+
+    只需要知道"有没有"时用这个：any在第一个用户标签处短路，
+    不构建过滤结果字典。
+
+    Args:
+        labels: 原始标签字典
+
+    Returns:
+        bool: 是否存在非系统标签
+    """
+    if not labels:
+        return False
+    return any(should_keep_label(k) for k in labels)
+
+
+def compile_env_filter(keywords: Optional[List[str]]) -> Optional[Pattern[str]]:
+    """
+    把过滤关键词列表编译为单个交替正则
+
+    子串匹配在 C 层一次扫描完成，代替对每个环境变量逐关键词的
+    Python 循环。
+
+    Args:
+        keywords: 过滤关键词列表
+
+    Returns:
+        编译后的正则，列表为空时返回 None
+    """
+    cleaned = {kw.strip() for kw in keywords or [] if kw and kw.strip()}
+    if not cleaned:
+        return None
+    # 去掉被其他关键词包含的冗余项：子串匹配下 'NODE_VERSION' 命中的
+    # 'VERSION' 必然也命中，默认列表因此收敛为单个 'VERSION'
+    pruned = [kw for kw in cleaned
+              if not any(other != kw and other in kw for other in cleaned)]
+    return re.compile('|'.join(map(re.escape, sorted(pruned))))
+
+
+# 默认关键词的多子串匹配器，导入时编译一次：交替正则在C层对变量名
+# 做单趟扫描，代替逐关键词的 `keyword in key` 循环
+DEFAULT_ENV_FILTER: Optional[Pattern[str]] = compile_env_filter(DEFAULT_ENV_VAR_KEYWORDS)
+
+
+@lru_cache(maxsize=4096)
+def _env_var_statically_blocked(key: str) -> bool:
+    """环境变量名是否命中静态黑名单（按变量名缓存）"""
+    return key in ENV_VAR_BLACKLIST or key.startswith(_ENV_VAR_PREFIXES)
+
+
+def should_keep_env_var(key: str,
+                        filter_keywords: Union[List[str], Pattern[str], None] = None) -> bool:
+    """
+    判断是否应该保留环境变量
+
+    静态黑名单部分只取决于变量名，走 lru_cache；动态关键词随用户
+    配置变化，不参与缓存键。
+
+    Args:
+        key: 环境变量名
+        filter_keywords: 额外的过滤关键词（列表或 compile_env_filter 的编译结果）
+
+    Returns:
+        bool: 是否保留该环境变量
+    """
+    if _env_var_statically_blocked(key):
+        return False
+
+    # 检查动态过滤关键词（编译过的正则走 C 层匹配）
+    if filter_keywords:
+        if isinstance(filter_keywords, re.Pattern):
+            if filter_keywords.search(key):
+                return False
+        else:
+            for keyword in filter_keywords:
+                keyword = keyword.strip()
+                if keyword and keyword in key:
+                    return False
+
+    return True
+
+
+def iter_filtered_env_vars(env_vars: Optional[List[Union[str, Tuple[str, str]]]],
+                           filter_keywords: Union[List[str], Pattern[str], None] = None
+                           ) -> Iterator[Tuple[str, str]]:
+    """
+    惰性迭代保留下来的环境变量键值对
+
+    条目既可以是Docker原始的 'KEY=value' 字符串，也可以是上游已经
+    切分好的 (key, value) 元组——后者直接跳过切分。
+
+    Args:
+        env_vars: 环境变量列表
+        filter_keywords: 额外的过滤关键词（列表或 compile_env_filter 的编译结果）
+
+    Yields:
+        (变量名, 值) 元组
+    """
+    if not env_vars:
+        return
+    keep = should_keep_env_var  # 局部绑定，循环内免去全局查找
+    for env_var in env_vars:
+        if isinstance(env_var, tuple):
+            key, value = env_var
+        else:
+            # partition一次扫描完成切分，省掉 '=' in 的前置遍历
+            key, sep, value = env_var.partition('=')
+            if not sep:
+                continue
+
+        if keep(key, filter_keywords):
+            yield sys.intern(key), value
+
+
+def filter_env_vars(env_vars: Optional[List[Union[str, Tuple[str, str]]]],
+                    filter_keywords: Union[List[str], Pattern[str], None] = None) -> Optional[Dict[str, str]]:
+    """
+    过滤环境变量，移除系统环境变量
+
+    Args:
+        env_vars: 环境变量列表，'KEY=value' 字符串或 (key, value) 元组
+        filter_keywords: 额外的过滤关键词（列表或 compile_env_filter 的编译结果）
+
+    Returns:
+        过滤后的环境变量字典，如果没有有效变量则返回 None
+    """
+    filtered = dict(iter_filtered_env_vars(env_vars, filter_keywords))
+    return filtered if filtered else None
+
+
+def parse_env_filter_keywords(filter_string: Optional[str]) -> List[str]:
+    """
+    解析环境变量过滤关键词字符串
+    
+    Args:
+        filter_string: 逗号分隔的过滤关键词字符串
+    
+    Returns:
+        过滤关键词列表
+    """
+    if not filter_string:
+        return []
+    
+    # 按逗号分割并清理
+    keywords = [kw.strip() for kw in filter_string.split(',') if kw.strip()]
+    return keywords
+
+
+def get_label_filter_stats(original: Optional[Dict[str, str]], 
+                           filtered: Optional[Dict[str, str]]) -> Dict[str, Union[int, float]]:
+    """
+    获取标签过滤统计信息
+    
+    Args:
+        original: 原始标签
+        filtered: 过滤后的标签
+    
+    Returns:
+        统计信息字典
+    """
+    original_count = len(original) if original else 0
+    filtered_count = len(filtered) if filtered else 0
+
+    return {
+        'original_count': original_count,
+        'filtered_count': filtered_count,
+        'removed_count': original_count - filtered_count,
+        # 比例以float返回，展示格式留给调用方，聚合时无需反解析字符串
+        'removed_ratio': (original_count - filtered_count) / original_count if original_count else 0.0
+    }
+
+
+# Watchtower 标签（用户通常希望保留）
+WATCHTOWER_LABELS: FrozenSet[str] = frozenset({
+    'com.centurylinklabs.watchtower.enable',
+    'com.centurylinklabs.watchtower.monitor-only',
+})
+
+
+def should_keep_watchtower_label(key: str) -> bool:
+    """判断是否是需要保留的 Watchtower 标签"""
+    return key in WATCHTOWER_LABELS or key.startswith('com.centurylinklabs.watchtower.')
+
+
+if __name__ == '__main__':
+    # 测试过滤器
+    test_labels = {
+        'com.docker.compose.project': 'myproject',
+        'com.docker.compose.service': 'web',
+        'org.opencontainers.image.title': 'My App',
+        'org.label-schema.name': 'My App',
+        'maintainer': 'test@example.com',
+        'my.custom.label': 'value',
+        'com.centurylinklabs.watchtower.enable': 'true',
+        'app.version': '1.0.0',
+    }
+    
+    filtered = filter_labels(test_labels)
+    stats = get_label_filter_stats(test_labels, filtered)
+    
+    print("标签过滤测试:")
+    print(f"  原始标签: {len(test_labels)} 个")
+    print(f"  过滤后: {len(filtered)} 个")
+    print(f"  移除: {stats['removed_count']} 个 ({stats['removed_ratio']:.1%})")
+    print(f"  保留的标签: {filtered}")
+    
+    test_env = [
+        'PATH=/usr/bin',
+        'HOME=/root',
+        'MY_APP_KEY=secret',
+        'DATABASE_URL=postgres://localhost',
+    ]
+    
+    filtered_env = filter_env_vars(test_env)
+    print("\n环境变量过滤测试:")
+    print(f"  原始环境变量: {len(test_env)} 个")
+    print(f"  过滤后: {len(filtered_env)} 个")
+    print(f"  保留的环境变量: {filtered_env}")
@@ -1,628 +1,856 @@
-#!/usr/bin/env python3
-"""
-D2C 调度器服务 - 独立进程版本
-提供更健壮的定时任务管理
-"""
-
-import os
-import sys
-import json
-import time
-import signal
-import threading
-import logging
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, Dict, Any, List
-
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
-from apscheduler.util import undefined
-
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-
-from config import D2CConfig, ConfigManager
-from converter import generate_compose_config, convert_container_to_service, group_containers_by_network
-from utils.docker_utils import get_containers, get_networks
-from utils.yaml_utils import dump_compose_config
-
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s [%(levelname)s] %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
-logger = logging.getLogger('D2CScheduler')
-
-# PID 文件
-PID_FILE = Path('/tmp/d2c_scheduler.pid')
-STATUS_FILE = Path('/tmp/d2c_scheduler.status')
-
-
-class SchedulerService:
-    """调度器服务 - 独立进程运行"""
-    
-    def __init__(self, config: D2CConfig):
-        self.config = config
-        self.scheduler: Optional[BackgroundScheduler] = None
-        self.running = False
-        self._shutdown_event = threading.Event()
-        
-    def _setup_signal_handlers(self):
-        """设置信号处理器"""
-        def shutdown_handler(signum, frame):
-            logger.info(f"收到信号 {signum}，准备退出...")
-            self._shutdown_event.set()
-        
-        def reload_handler(signum, frame):
-            logger.info(f"收到信号 {signum}，准备重载配置...")
-            self._reload_config()
-        
-        signal.signal(signal.SIGTERM, shutdown_handler)
-        signal.signal(signal.SIGINT, shutdown_handler)
-        signal.signal(signal.SIGHUP, reload_handler)
-    
-    def _update_status(self):
-        """更新状态文件"""
-        status = {
-            'running': self.running,
-            'cron': self.config.cron,
-            'pid': os.getpid(),
-            'started_at': datetime.now().isoformat(),
-            'last_update': datetime.now().isoformat()
-        }
-        
-        # 获取下次执行时间
-        if self.scheduler:
-            try:
-                job = self.scheduler.get_job('d2c_backup')
-                if job and job.next_run_time:
-                    status['next_run'] = job.next_run_time.isoformat()
-            except Exception:
-                pass
-        
-        try:
-            with open(STATUS_FILE, 'w') as f:
-                json.dump(status, f)
-        except Exception as e:
-            logger.error(f"更新状态文件失败: {e}")
-    
-    def run_task(self):
-        """执行备份任务 - 按网络分组生成多个 compose 文件"""
-        try:
-            logger.info("=" * 50)
-            logger.info("开始执行定时备份任务")
-            logger.info(f"当前时间: {datetime.now().isoformat()}")
-            logger.info(f"当前配置: CRON={self.config.cron}, TZ={self.config.timezone}")
-            
-            timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
-            output_dir = f"{self.config.output_dir}/{timestamp}"
-            os.makedirs(output_dir, exist_ok=True)
-            
-            containers = get_containers()
-            if not containers:
-                logger.warning("未找到 Docker 容器")
-                return
-            
-            logger.info(f"找到 {len(containers)} 个容器")
-            
-            networks = get_networks()
-            logger.info(f"找到 {len(networks)} 个网络")
-            
-            # 按网络分组容器
-            from converter import group_containers_by_network
-            logger.info("开始按网络分组容器...")
-            container_groups = group_containers_by_network(containers, networks)
-            logger.info(f"容器分组完成，共 {len(container_groups)} 个分组")
-            
-            # 打印每个组的信息
-            for i, group in enumerate(container_groups):
-                logger.info(f"  组 {i+1}: {len(group)} 个容器")
-                for cid in group[:3]:  # 只显示前3个
-                    for c in containers:
-                        if c['Id'] == cid:
-                            logger.info(f"    - {c['Name'].lstrip('/')}")
-                            break
-            
-            # 为每个组生成单独的 compose 文件
-            generated_files = []
-            for i, group in enumerate(container_groups):
-                file_path = self._generate_compose_for_group(
-                    group, containers, networks, output_dir, i + 1
-                )
-                if file_path:
-                    generated_files.append(file_path)
-                    logger.info(f"第 {i+1} 组备份完成: {os.path.basename(file_path)}")
-            
-            logger.info(f"备份完成，共生成 {len(generated_files)} 个文件:")
-            for f in generated_files:
-                logger.info(f"  - {f}")
-            
-            # 记录执行日志
-            self._log_execution(True, f"备份 {len(containers)} 个容器到 {output_dir}，生成 {len(generated_files)} 个 compose 文件", output_dir)
-            logger.info("=" * 50)
-            
-        except Exception as e:
-            logger.error(f"任务执行失败: {e}")
-            self._log_execution(False, str(e))
-    
-    def _generate_compose_for_group(self, group: list, all_containers: list, 
-                                     networks: dict, output_dir: str, group_index: int) -> str:
-        """为单个容器组生成 compose 文件"""
-        import re
-        
-        compose = {
-            'version': '3.8',
-            'services': {},
-        }
-        
-        # 收集使用的网络
-        used_networks = set()
-        for container_id in group:
-            for container in all_containers:
-                if container['Id'] == container_id:
-                    for network_name in container.get('NetworkSettings', {}).get('Networks', {}):
-                        if network_name not in ['bridge', 'host', 'none']:
-                            used_networks.add(network_name)
-        
-        if used_networks:
-            compose['networks'] = {}
-            for network in used_networks:
-                if '_default' in network or network.startswith('bridge') or network.startswith('host'):
-                    compose['networks'][network] = {'external': True}
-                else:
-                    compose['networks'][network] = {}
-        
-        # 添加服务配置
-        for container_id in group:
-            for container in all_containers:
-                if container['Id'] == container_id:
-                    container_name = container['Name'].lstrip('/')
-                    service_name = re.sub(r'[^a-zA-Z0-9_]', '_', container_name)
-                    compose['services'][service_name] = convert_container_to_service(
-                        container, self.config, networks
-                    )
-        
-        # 生成文件名
-        if len(group) == 1:
-            for container in all_containers:
-                if container['Id'] == group[0]:
-                    filename = f"{container['Name'].lstrip('/')}.yaml"
-                    break
-        else:
-            # 根据网络类型生成文件名
-            group_network_type = None
-            macvlan_network_name = None
-            
-            for container_id in group:
-                for container in all_containers:
-                    if container['Id'] == container_id:
-                        network_mode = container.get('HostConfig', {}).get('NetworkMode', '')
-                        if network_mode == 'host':
-                            group_network_type = 'host'
-                            break
-                        for network_name, network_config in container.get('NetworkSettings', {}).get('Networks', {}).items():
-                            if network_name in networks and networks[network_name].get('Driver') == 'macvlan':
-                                group_network_type = 'macvlan'
-                                macvlan_network_name = network_name
-                                break
-                        if group_network_type:
-                            break
-                if group_network_type:
-                    break
-            
-            if group_network_type == 'host':
-                filename = "host-group.yaml"
-            elif group_network_type == 'macvlan' and macvlan_network_name:
-                filename = f"{macvlan_network_name}-group.yaml"
-            else:
-                for container in all_containers:
-                    if container['Id'] == group[0]:
-                        prefix = container['Name'].lstrip('/').split('_')[0]
-                        filename = f"{prefix}-group.yaml"
-                        break
-        
-        # 生成 YAML
-        yaml_content = dump_compose_config(compose)
-        
-        file_path = os.path.join(output_dir, filename)
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(yaml_content)
-        
-        return file_path
-    
-    def _log_execution(self, success: bool, message: str, output_dir: Optional[str] = None):
-        """记录执行历史"""
-        try:
-            log_file = Path('/app/logs/executions.json')
-            log_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            executions = []
-            if log_file.exists():
-                with open(log_file, 'r') as f:
-                    executions = json.load(f)
-            
-            executions.insert(0, {
-                'timestamp': datetime.now().isoformat(),
-                'success': success,
-                'message': message,
-                'output_dir': output_dir
-            })
-            
-            # 只保留最近 100 条
-            executions = executions[:100]
-            
-            with open(log_file, 'w') as f:
-                json.dump(executions, f, indent=2)
-                
-        except Exception as e:
-            logger.error(f"记录执行日志失败: {e}")
-    
-    def parse_cron(self, cron_expr: str) -> Optional[CronTrigger]:
-        """解析 CRON 表达式"""
-        if cron_expr in ('once', 'manual'):
-            return None
-        
-        parts = cron_expr.split()
-        
-        # 获取时区
-        try:
-            from pytz import timezone
-            tz = timezone(self.config.timezone)
-        except Exception:
-            from pytz import utc
-            tz = utc
-        
-        if len(parts) == 5:
-            minute, hour, day, month, day_of_week = parts
-            return CronTrigger(
-                minute=minute, hour=hour, day=day,
-                month=month, day_of_week=day_of_week,
-                timezone=tz
-            )
-        elif len(parts) == 6:
-            second, minute, hour, day, month, day_of_week = parts
-            return CronTrigger(
-                second=second, minute=minute, hour=hour,
-                day=day, month=month, day_of_week=day_of_week,
-                timezone=tz
-            )
-        
-        return None
-    
-    def start(self):
-        """启动调度器服务"""
-        logger.info("=" * 50)
-        logger.info("D2C 调度器服务启动")
-        logger.info(f"CRON: {self.config.cron}")
-        logger.info(f"时区: {self.config.timezone}")
-        logger.info(f"输出目录: {self.config.output_dir}")
-        logger.info(f"当前时间: {datetime.now().isoformat()}")
-        
-        self._setup_signal_handlers()
-        
-        # 检查是否手动模式
-        if self.config.cron == 'manual':
-            logger.info("手动模式，不启动定时任务")
-            self._write_pid()
-            self._wait_for_shutdown()
-            return
-        
-        # 检查是否一次性执行
-        if self.config.cron == 'once':
-            logger.info("一次性执行模式")
-            self.run_task()
-            return
-        
-        # 创建调度器
-        logger.info(f"正在解析 CRON 表达式: {self.config.cron}")
-        trigger = self.parse_cron(self.config.cron)
-        if not trigger:
-            logger.error(f"无效的 CRON 表达式: {self.config.cron}")
-            return
-        logger.info("CRON 表达式解析成功")
-        
-        logger.info("正在创建调度器...")
-        self.scheduler = BackgroundScheduler()
-        self.scheduler.add_job(
-            self.run_task,
-            trigger=trigger,
-            id='d2c_backup',
-            name='D2C Backup Task'
-        )
-        logger.info("任务已添加到调度器")
-        
-        logger.info("正在启动调度器...")
-        self.scheduler.start()
-        self.running = True
-        self._write_pid()
-        logger.info(f"PID 文件已写入: {PID_FILE}")
-        
-        # 获取下次执行时间
-        job = self.scheduler.get_job('d2c_backup')
-        if job and job.next_run_time:
-            logger.info(f"下次执行时间: {job.next_run_time}")
-        else:
-            logger.warning("无法获取下次执行时间")
-        
-        logger.info("调度器已启动，等待任务执行...")
-        logger.info("=" * 50)
-        
-        # 主循环 - 定期更新状态文件
-        try:
-            while not self._shutdown_event.is_set():
-                self._update_status()
-                time.sleep(5)
-        except Exception as e:
-            logger.error(f"主循环异常: {e}")
-        finally:
-            self.stop()
-    
-    def stop(self):
-        """停止调度器服务"""
-        logger.info("停止调度器服务...")
-        self.running = False
-        
-        if self.scheduler:
-            try:
-                self.scheduler.shutdown(wait=True)
-            except Exception as e:
-                logger.error(f"停止调度器异常: {e}")
-        
-        self._remove_pid()
-        logger.info("调度器服务已停止")
-    
-    def _write_pid(self):
-        """写入 PID 文件"""
-        try:
-            with open(PID_FILE, 'w') as f:
-                f.write(str(os.getpid()))
-        except Exception as e:
-            logger.error(f"写入 PID 文件失败: {e}")
-    
-    def _remove_pid(self):
-        """移除 PID 文件"""
-        try:
-            if PID_FILE.exists():
-                PID_FILE.unlink()
-        except Exception as e:
-            logger.error(f"移除 PID 文件失败: {e}")
-    
-    def _wait_for_shutdown(self):
-        """等待关闭信号"""
-        while not self._shutdown_event.is_set():
-            self._update_status()
-            time.sleep(5)
-    
-    def _reload_config(self):
-        """重载配置（热更新）"""
-        try:
-            logger.info("=" * 50)
-            logger.info("开始重载配置...")
-            
-            # 重新加载配置
-            config_manager = ConfigManager()
-            new_config = config_manager.load(force=True)
-            old_cron = self.config.cron
-            self.config = new_config
-            
-            logger.info(f"配置已重载: TZ={self.config.timezone}, NETWORK={self.config.network}")
-            logger.info(f"网络配置: {self.config.network}, Healthcheck: {self.config.show_healthcheck}, CapAdd: {self.config.show_cap_add}")
-            logger.info(f"环境过滤: {self.config.env_filter_keywords}")
-            
-            # 如果 CRON 表达式变化了，需要重新调度任务
-            if old_cron != self.config.cron:
-                logger.info(f"CRON 表达式变化: {old_cron} -> {self.config.cron}")
-                
-                # 检查是否为 manual 或 once 模式
-                if self.config.cron in ('manual', 'once'):
-                    logger.info(f"切换到 {self.config.cron} 模式，停止调度器")
-                    self.stop()
-                    return
-                
-                # 重新解析 CRON 表达式
-                new_trigger = self.parse_cron(self.config.cron)
-                if not new_trigger:
-                    logger.error(f"无效的 CRON 表达式: {self.config.cron}")
-                    return
-                
-                # 重新调度任务
-                if self.scheduler:
-                    try:
-                        # 移除旧任务
-                        self.scheduler.remove_job('d2c_backup')
-                        logger.info("已移除旧任务")
-                        
-                        # 添加新任务
-                        self.scheduler.add_job(
-                            self.run_task,
-                            trigger=new_trigger,
-                            id='d2c_backup',
-                            name='D2C Backup Task'
-                        )
-                        logger.info(f"已添加新任务，CRON: {self.config.cron}")
-                        
-                        # 获取下次执行时间
-                        job = self.scheduler.get_job('d2c_backup')
-                        if job and job.next_run_time:
-                            logger.info(f"下次执行时间: {job.next_run_time}")
-                    except Exception as e:
-                        logger.error(f"重新调度任务失败: {e}")
-                        return
-                
-                logger.info("调度器已更新")
-            else:
-                logger.info("CRON 表达式未变化，无需更新调度器")
-            
-            self._update_status()
-            logger.info("配置重载完成")
-            logger.info("=" * 50)
-            
-        except Exception as e:
-            logger.error(f"重载配置失败: {e}")
-
-
-def is_running() -> bool:
-    """检查调度器是否正在运行"""
-    if not PID_FILE.exists():
-        return False
-    
-    try:
-        with open(PID_FILE, 'r') as f:
-            pid = int(f.read().strip())
-        
-        # 检查进程是否存在
-        os.kill(pid, 0)
-        return True
-    except (ValueError, ProcessLookupError, FileNotFoundError):
-        return False
-
-
-def start_service(config_path: str = '/app/config/config.json'):
-    """启动调度器服务"""
-    import fcntl
-    
-    # 使用文件锁确保只有一个实例启动
-    lock_file = Path('/tmp/d2c_scheduler.lock')
-    try:
-        with open(lock_file, 'w') as f:
-            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
-            
-            if is_running():
-                logger.warning("调度器服务已在运行")
-                return
-            
-            logger.info(f"正在加载配置: {config_path}")
-            config_manager = ConfigManager(config_path)
-            config = config_manager.load()
-            
-            logger.info(f"配置加载完成: CRON={config.cron}, TZ={config.timezone}")
-            
-            service = SchedulerService(config)
-            service.start()
-            
-    except (IOError, OSError) as e:
-        logger.error(f"获取调度器锁失败: {e}")
-        raise
-
-
-def stop_service():
-    """停止调度器服务"""
-    if not PID_FILE.exists():
-        logger.info("调度器服务未运行")
-        return
-    
-    try:
-        with open(PID_FILE, 'r') as f:
-            pid = int(f.read().strip())
-        
-        os.kill(pid, signal.SIGTERM)
-        logger.info(f"已发送停止信号到进程 {pid}")
-        
-        # 等待进程退出
-        for _ in range(10):
-            try:
-                os.kill(pid, 0)
-                time.sleep(0.5)
-            except ProcessLookupError:
-                logger.info("调度器服务已停止")
-                return
-        
-        # 强制终止
-        os.kill(pid, signal.SIGKILL)
-        logger.warning("强制终止调度器服务")
-        
-    except Exception as e:
-        logger.error(f"停止服务失败: {e}")
-
-
-def reload_service():
-    """重载调度器配置（发送 SIGHUP 信号）"""
-    if not PID_FILE.exists():
-        logger.info("调度器服务未运行，无需重载")
-        return False
-    
-    try:
-        with open(PID_FILE, 'r') as f:
-            pid = int(f.read().strip())
-        
-        # 检查进程是否存在
-        try:
-            os.kill(pid, 0)
-        except ProcessLookupError:
-            logger.warning("调度器进程不存在")
-            return False
-        
-        # 发送 SIGHUP 信号触发重载
-        os.kill(pid, signal.SIGHUP)
-        logger.info(f"已发送重载信号到进程 {pid}")
-        return True
-        
-    except Exception as e:
-        logger.error(f"重载服务失败: {e}")
-        return False
-
-
-def get_service_status() -> Dict[str, Any]:
-    """获取调度器服务状态"""
-    status = {
-        'running': False,
-        'pid': None,
-        'cron': None,
-        'started_at': None
-    }
-    
-    if STATUS_FILE.exists():
-        try:
-            with open(STATUS_FILE, 'r') as f:
-                status = json.load(f)
-        except:
-            pass
-    
-    # 验证进程是否存在
-    if status.get('pid'):
-        try:
-            os.kill(status['pid'], 0)
-            status['running'] = True
-        except ProcessLookupError:
-            status['running'] = False
-    
-    return status
-
-
-def run_once_service(config_path: str = '/app/config/config.json'):
-    """立即执行一次任务（不启动调度器）"""
-    config_manager = ConfigManager(config_path)
-    config = config_manager.load()
-    
-    service = SchedulerService(config)
-    
-    # 直接运行任务
-    logger.info("执行立即运行任务...")
-    service.run_task()
-    logger.info("任务执行完成")
-
-
-if __name__ == '__main__':
-    import argparse
-    
-    parser = argparse.ArgumentParser(description='D2C 调度器服务')
-    parser.add_argument('--config', '-c', default='/app/config/config.json')
-    parser.add_argument('action', choices=['start', 'stop', 'reload', 'status', 'run-once'], 
-                        default='start', nargs='?')
-    
-    args = parser.parse_args()
-    
-    if args.action == 'start':
-        start_service(args.config)
-    elif args.action == 'stop':
-        stop_service()
-    elif args.action == 'reload':
-        reload_service()
-    elif args.action == 'status':
-        status = get_service_status()
-        print(json.dumps(status, indent=2))
-    elif args.action == 'run-once':
-        run_once_service(args.config)
+#!/usr/bin/env python3
+"""
+D2C 调度器服务 - 独立进程版本
+提供更健壮的定时任务管理
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import queue
+import signal
+import socket
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+# orjson序列化/解析均为C实现，未安装时回退标准库
+try:
+    import orjson
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _json_loads = orjson.loads
+except ImportError:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+import pytz
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.triggers.cron import CronTrigger
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.util import undefined
+
+# 添加项目路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import D2CConfig, ConfigManager
+from converter import generate_compose_config, convert_container_to_service, group_containers_by_network
+from utils.docker_utils import get_containers, get_networks
+from utils.execution_log import append_execution
+from utils.yaml_utils import dump_compose_config
+
+# 配置日志
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger('D2CScheduler')
+
+# PID 文件
+PID_FILE = Path('/tmp/d2c_scheduler.pid')
+STATUS_FILE = Path('/tmp/d2c_scheduler.status')
+
+# 命令套接字：守护进程在线时Web端直接走它下发stop/reload/status/
+# run-once，免去每个调度器接口fork一个python3解释器的冷启动
+COMMAND_SOCK = Path('/tmp/d2c_scheduler.sock')
+
+# 服务名清洗正则，模块级编译一次
+_SERVICE_NAME_RE = re.compile(r'[^a-zA-Z0-9_]')
+
+# 状态文件刷新间隔的上下限（秒）：任务临近时刷新快，离得远时放缓
+_STATUS_INTERVAL_MIN = 30.0
+_STATUS_INTERVAL_MAX = 300.0
+
+# Docker信息短时缓存：重载+手动触发等背靠背的任务在该窗口内
+# 复用同一份容器/网络数据，不重复请求守护进程
+_DOCKER_CACHE_TTL = 5.0
+_docker_cache: Dict[str, Any] = {}
+
+
+@lru_cache(maxsize=16)
+def _parse_cron_trigger(cron_expr: str, tz_name: str) -> Optional[CronTrigger]:
+    """
+    解析 CRON 表达式为触发器（按表达式+时区记忆化）
+
+    pytz.timezone首次解析某时区要读ZIC文件，CronTrigger构造也不便宜；
+    相同配置的重复重载直接命中缓存。
+    """
+    parts = cron_expr.split()
+
+    try:
+        tz = pytz.timezone(tz_name)
+    except Exception:
+        tz = pytz.utc
+
+    if len(parts) == 5:
+        minute, hour, day, month, day_of_week = parts
+        return CronTrigger(
+            minute=minute, hour=hour, day=day,
+            month=month, day_of_week=day_of_week,
+            timezone=tz
+        )
+    elif len(parts) == 6:
+        second, minute, hour, day, month, day_of_week = parts
+        return CronTrigger(
+            second=second, minute=minute, hour=hour,
+            day=day, month=month, day_of_week=day_of_week,
+            timezone=tz
+        )
+
+    return None
+
+
+def _atomic_write(path: Path, data: str):
+    """先写临时文件再rename替换
+
+    rename在同一文件系统上是原子的inode交换，读方（Web UI轮询
+    状态文件）永远不会读到半截内容，即使写入进程中途被SIGKILL。
+    """
+    tmp = path.with_suffix(path.suffix + '.tmp')
+    tmp.write_text(data)
+    os.replace(tmp, path)
+
+
+def _cached_docker_fetch(key: str, fetch):
+    """带TTL的Docker信息获取，窗口内直接返回上次结果"""
+    now = time.monotonic()
+    cached = _docker_cache.get(key)
+    if cached and now - cached[0] < _DOCKER_CACHE_TTL:
+        return cached[1]
+    value = fetch()
+    _docker_cache[key] = (now, value)
+    return value
+
+
+class SchedulerService:
+    """调度器服务 - 独立进程运行"""
+    
+    def __init__(self, config: D2CConfig):
+        self.config = config
+        self.scheduler: Optional[BackgroundScheduler] = None
+        self.running = False
+        self._shutdown_event = threading.Event()
+        self._reload_event = threading.Event()
+        # 主循环等待的唤醒事件，关闭/重载信号都通过它打断等待
+        self._wake_event = threading.Event()
+        self._command_server: Optional[socket.socket] = None
+
+    def _setup_signal_handlers(self):
+        """设置信号处理器
+
+        处理器只置位事件就返回——文件I/O、日志和调度器改动都不该
+        在信号上下文里执行；实际重载由主循环完成。
+        """
+        def shutdown_handler(signum, frame):
+            logger.info(f"收到信号 {signum}，准备退出...")
+            self._shutdown_event.set()
+            self._wake_event.set()
+
+        def reload_handler(signum, frame):
+            logger.info(f"收到信号 {signum}，准备重载配置...")
+            self._reload_event.set()
+            self._wake_event.set()
+
+        signal.signal(signal.SIGTERM, shutdown_handler)
+        signal.signal(signal.SIGINT, shutdown_handler)
+        signal.signal(signal.SIGHUP, reload_handler)
+
+    def _drain_reload(self):
+        """主循环中消费重载事件：短暂等待合并连续的SIGHUP，只重载一次"""
+        if not self._reload_event.is_set() or self._shutdown_event.is_set():
+            return
+        time.sleep(0.2)
+        self._reload_event.clear()
+        self._reload_config()
+    
+    def _build_status(self) -> Dict[str, Any]:
+        """构建当前状态字典（状态文件和命令套接字共用）"""
+        status = {
+            'running': self.running,
+            'cron': self.config.cron,
+            'pid': os.getpid(),
+            'started_at': datetime.now().isoformat(),
+            'last_update': datetime.now().isoformat()
+        }
+
+        # 获取下次执行时间
+        if self.scheduler:
+            try:
+                job = self.scheduler.get_job('d2c_backup')
+                if job and job.next_run_time:
+                    status['next_run'] = job.next_run_time.isoformat()
+            except Exception:
+                pass
+
+        return status
+
+    def _update_status(self):
+        """更新状态文件"""
+        try:
+            # 先序列化成整串，再经临时文件原子替换到位
+            _atomic_write(STATUS_FILE, _json_dumps(self._build_status()))
+        except Exception as e:
+            logger.error(f"更新状态文件失败: {e}")
+
+    def _start_command_server(self):
+        """启动命令套接字监听线程
+
+        接受 stop/reload/status/run-once 单行命令，应答JSON。
+        处理只是置位事件或读内存状态，毫秒级返回。
+        """
+        try:
+            COMMAND_SOCK.unlink(missing_ok=True)
+            server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            server.bind(str(COMMAND_SOCK))
+            server.listen(4)
+        except OSError as e:
+            logger.error(f"命令套接字启动失败: {e}")
+            return
+
+        self._command_server = server
+        threading.Thread(target=self._serve_commands, args=(server,),
+                         daemon=True).start()
+        logger.info(f"命令套接字已监听: {COMMAND_SOCK}")
+
+    def _serve_commands(self, server: socket.socket):
+        """命令套接字接受循环；服务停止时随套接字关闭退出"""
+        while not self._shutdown_event.is_set():
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            try:
+                command = conn.recv(64).decode('utf-8', errors='replace').strip()
+                conn.sendall(self._handle_command(command).encode())
+            except OSError:
+                pass
+            finally:
+                conn.close()
+
+    def _handle_command(self, command: str) -> str:
+        """处理一条套接字命令，返回JSON应答"""
+        if command == 'status':
+            return _json_dumps(self._build_status())
+        if command == 'reload':
+            self._reload_event.set()
+            self._wake_event.set()
+            return '{"success": true}'
+        if command == 'stop':
+            self._shutdown_event.set()
+            self._wake_event.set()
+            return '{"success": true}'
+        if command == 'run-once':
+            # 任务放后台线程执行，命令立即返回
+            threading.Thread(target=self.run_task, daemon=True).start()
+            return '{"success": true}'
+        if command == 'start':
+            return '{"success": true, "message": "already running"}'
+        return '{"success": false, "error": "unknown command"}'
+
+    def _stop_command_server(self):
+        """关闭命令套接字，唤醒accept循环退出"""
+        server = getattr(self, '_command_server', None)
+        if server is not None:
+            self._command_server = None
+            try:
+                server.close()
+            except OSError:
+                pass
+        try:
+            COMMAND_SOCK.unlink(missing_ok=True)
+        except OSError:
+            pass
+    
+    def run_task(self):
+        """执行备份任务 - 按网络分组生成多个 compose 文件"""
+        try:
+            logger.info("=" * 50)
+            logger.info("开始执行定时备份任务")
+            logger.info(f"当前时间: {datetime.now().isoformat()}")
+            logger.info(f"当前配置: CRON={self.config.cron}, TZ={self.config.timezone}")
+            
+            timestamp = datetime.now().strftime("%Y_%m_%d_%H_%M")
+            output_dir = f"{self.config.output_dir}/{timestamp}"
+            os.makedirs(output_dir, exist_ok=True)
+            
+            containers = _cached_docker_fetch('containers', get_containers)
+            if not containers:
+                logger.warning("未找到 Docker 容器")
+                return
+
+            logger.info(f"找到 {len(containers)} 个容器")
+
+            networks = _cached_docker_fetch('networks', get_networks)
+            logger.info(f"找到 {len(networks)} 个网络")
+
+            # ID索引建一次，后续各组按ID取容器都是O(1)查找
+            containers_by_id = {c['Id']: c for c in containers}
+
+            # 按网络分组容器
+            logger.info("开始按网络分组容器...")
+            container_groups = group_containers_by_network(containers, networks)
+            logger.info(f"容器分组完成，共 {len(container_groups)} 个分组")
+
+            # 打印每个组的信息
+            for i, group in enumerate(container_groups):
+                logger.info(f"  组 {i+1}: {len(group)} 个容器")
+                for cid in group[:3]:  # 只显示前3个
+                    c = containers_by_id.get(cid)
+                    if c:
+                        logger.info(f"    - {c['Name'].lstrip('/')}")
+
+            # 为每个组生成单独的 compose 文件：工作线程只做compose构建和
+            # YAML序列化（CPU为主），落盘交给专职写入线程串行处理，
+            # 一个组的文件在写盘时下一个组的YAML已在生成
+            generated_files = []
+            write_queue: queue.Queue = queue.Queue(maxsize=4)
+            writer = threading.Thread(target=self._write_worker,
+                                      args=(write_queue,), daemon=True)
+            writer.start()
+            try:
+                with ThreadPoolExecutor(max_workers=min(8, len(container_groups))) as pool:
+                    futures = {
+                        pool.submit(self._generate_compose_for_group,
+                                    group, containers_by_id, networks,
+                                    output_dir, i + 1, write_queue): i
+                        for i, group in enumerate(container_groups)
+                    }
+                    for future in as_completed(futures):
+                        i = futures[future]
+                        try:
+                            file_path = future.result()
+                        except Exception as e:
+                            logger.error(f"第 {i+1} 组备份失败: {e}")
+                            continue
+                        if file_path:
+                            generated_files.append(file_path)
+                            logger.info(f"第 {i+1} 组备份完成: {os.path.basename(file_path)}")
+            finally:
+                # 等全部文件落盘后再结束写入线程并记录执行日志
+                write_queue.join()
+                write_queue.put(None)
+                writer.join()
+
+            logger.info(f"备份完成，共生成 {len(generated_files)} 个文件:")
+            for f in generated_files:
+                logger.info(f"  - {f}")
+            
+            # 记录执行日志
+            self._log_execution(True, f"备份 {len(containers)} 个容器到 {output_dir}，生成 {len(generated_files)} 个 compose 文件", output_dir)
+            logger.info("=" * 50)
+            
+        except Exception as e:
+            logger.error(f"任务执行失败: {e}")
+            self._log_execution(False, str(e))
+    
+    @staticmethod
+    def _write_worker(write_queue: 'queue.Queue'):
+        """写入线程：串行落盘队列中的 (路径, 内容)，None 为结束信号"""
+        while True:
+            item = write_queue.get()
+            try:
+                if item is None:
+                    return
+                file_path, content = item
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(content)
+            except Exception as e:
+                logger.error(f"写入 compose 文件失败: {e}")
+            finally:
+                write_queue.task_done()
+
+    def _generate_compose_for_group(self, group: list, containers_by_id: dict,
+                                     networks: dict, output_dir: str, group_index: int,
+                                     write_queue: 'queue.Queue') -> str:
+        """为单个容器组构建 compose 配置并序列化，落盘交给写入线程"""
+        compose = {
+            'version': '3.8',
+            'services': {},
+        }
+
+        # 组内容器按索引一次取齐，后续不再扫描全量容器列表
+        group_containers = [containers_by_id[cid] for cid in group
+                            if cid in containers_by_id]
+
+        # 单次遍历组内容器：同时完成服务转换、网络收集和
+        # 文件名用的网络类型判定（host/macvlan），不再分多趟扫描
+        services = compose['services']
+        used_networks = set()
+        group_network_type = None
+        macvlan_network_name = None
+
+        for container in group_containers:
+            container_networks = container.get('NetworkSettings', {}).get('Networks', {})
+            for network_name in container_networks:
+                if network_name not in ('bridge', 'host', 'none'):
+                    used_networks.add(network_name)
+
+            container_name = container['Name'].lstrip('/')
+            service_name = _SERVICE_NAME_RE.sub('_', container_name)
+            services[service_name] = convert_container_to_service(
+                container, self.config, networks
+            )
+
+            # 网络类型以首个命中的容器为准
+            if group_network_type is None:
+                if container.get('HostConfig', {}).get('NetworkMode', '') == 'host':
+                    group_network_type = 'host'
+                else:
+                    for network_name in container_networks:
+                        if network_name in networks and networks[network_name].get('Driver') == 'macvlan':
+                            group_network_type = 'macvlan'
+                            macvlan_network_name = network_name
+                            break
+
+        if used_networks:
+            compose['networks'] = {
+                network: {'external': True}
+                if '_default' in network or network.startswith(('bridge', 'host'))
+                else {}
+                for network in used_networks
+            }
+
+        # 生成文件名
+        if len(group_containers) == 1:
+            filename = f"{group_containers[0]['Name'].lstrip('/')}.yaml"
+        else:
+            # 根据单次遍历时判定的网络类型生成文件名
+            if group_network_type == 'host':
+                filename = "host-group.yaml"
+            elif group_network_type == 'macvlan' and macvlan_network_name:
+                filename = f"{macvlan_network_name}-group.yaml"
+            else:
+                prefix = group_containers[0]['Name'].lstrip('/').split('_')[0]
+                filename = f"{prefix}-group.yaml"
+        
+        # 生成 YAML；序列化在本线程完成，写盘排队交给写入线程
+        yaml_content = dump_compose_config(compose)
+
+        file_path = os.path.join(output_dir, filename)
+        write_queue.put((file_path, yaml_content))
+
+        return file_path
+    
+    def _log_execution(self, success: bool, message: str, output_dir: Optional[str] = None):
+        """记录执行历史（JSONL追加，单条记录O(1)写入）"""
+        try:
+            append_execution({
+                'timestamp': datetime.now().isoformat(),
+                'success': success,
+                'message': message,
+                'output_dir': output_dir
+            })
+        except Exception as e:
+            logger.error(f"记录执行日志失败: {e}")
+    
+    def parse_cron(self, cron_expr: str) -> Optional[CronTrigger]:
+        """解析 CRON 表达式"""
+        if cron_expr in ('once', 'manual'):
+            return None
+
+        return _parse_cron_trigger(cron_expr, self.config.timezone)
+    
+    def start(self):
+        """启动调度器服务"""
+        logger.info("=" * 50)
+        logger.info("D2C 调度器服务启动")
+        logger.info(f"CRON: {self.config.cron}")
+        logger.info(f"时区: {self.config.timezone}")
+        logger.info(f"输出目录: {self.config.output_dir}")
+        logger.info(f"当前时间: {datetime.now().isoformat()}")
+        
+        self._setup_signal_handlers()
+        
+        # 检查是否手动模式
+        if self.config.cron == 'manual':
+            logger.info("手动模式，不启动定时任务")
+            self._write_pid()
+            self._start_command_server()
+            self._wait_for_shutdown()
+            self.stop()
+            return
+        
+        # 检查是否一次性执行
+        if self.config.cron == 'once':
+            logger.info("一次性执行模式")
+            self.run_task()
+            return
+        
+        # 创建调度器
+        logger.info(f"正在解析 CRON 表达式: {self.config.cron}")
+        trigger = self.parse_cron(self.config.cron)
+        if not trigger:
+            logger.error(f"无效的 CRON 表达式: {self.config.cron}")
+            return
+        logger.info("CRON 表达式解析成功")
+        
+        logger.info("正在创建调度器...")
+        self.scheduler = BackgroundScheduler()
+        # 任务结束立刻推送一次状态（含新的next_run），不等轮询周期
+        self.scheduler.add_listener(self._on_job_event,
+                                    EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        self.scheduler.add_job(
+            self.run_task,
+            trigger=trigger,
+            id='d2c_backup',
+            name='D2C Backup Task'
+        )
+        logger.info("任务已添加到调度器")
+        
+        logger.info("正在启动调度器...")
+        self.scheduler.start()
+        self.running = True
+        self._write_pid()
+        self._start_command_server()
+        logger.info(f"PID 文件已写入: {PID_FILE}")
+        
+        # 获取下次执行时间
+        job = self.scheduler.get_job('d2c_backup')
+        if job and job.next_run_time:
+            logger.info(f"下次执行时间: {job.next_run_time}")
+        else:
+            logger.warning("无法获取下次执行时间")
+        
+        logger.info("调度器已启动，等待任务执行...")
+        logger.info("=" * 50)
+        
+        # 主循环 - 定期更新状态文件；Event.wait让SIGTERM立即唤醒，
+        # 间隔随下次执行时间自适应，不再每5秒重写一次状态文件
+        try:
+            while not self._shutdown_event.is_set():
+                self._update_status()
+                self._wake_event.wait(timeout=self._status_interval())
+                self._wake_event.clear()
+                self._drain_reload()
+        except Exception as e:
+            logger.error(f"主循环异常: {e}")
+        finally:
+            self.stop()
+    
+    def stop(self):
+        """停止调度器服务"""
+        logger.info("停止调度器服务...")
+        self.running = False
+        self._stop_command_server()
+
+        if self.scheduler:
+            try:
+                self.scheduler.shutdown(wait=True)
+            except Exception as e:
+                logger.error(f"停止调度器异常: {e}")
+        
+        self._remove_pid()
+        logger.info("调度器服务已停止")
+    
+    def _write_pid(self):
+        """写入 PID 文件"""
+        try:
+            _atomic_write(PID_FILE, str(os.getpid()))
+        except Exception as e:
+            logger.error(f"写入 PID 文件失败: {e}")
+    
+    def _remove_pid(self):
+        """移除 PID 文件"""
+        try:
+            if PID_FILE.exists():
+                PID_FILE.unlink()
+        except Exception as e:
+            logger.error(f"移除 PID 文件失败: {e}")
+    
+    def _on_job_event(self, event):
+        """任务执行完成/出错的回调：立即刷新状态文件"""
+        if event.exception:
+            logger.error(f"任务执行异常: {event.exception}")
+        self._update_status()
+
+    def _status_interval(self) -> float:
+        """计算下一次状态刷新间隔
+
+        下次执行还很远时放慢刷新——状态内容只有任务执行、重载和
+        关闭时才真正变化。
+        """
+        if self.scheduler:
+            try:
+                job = self.scheduler.get_job('d2c_backup')
+                if job and job.next_run_time:
+                    remaining = (job.next_run_time
+                                 - datetime.now(job.next_run_time.tzinfo)).total_seconds()
+                    if remaining > 600:
+                        return min(_STATUS_INTERVAL_MAX, max(_STATUS_INTERVAL_MIN, remaining / 2))
+            except Exception:
+                pass
+        return _STATUS_INTERVAL_MIN
+
+    def _wait_for_shutdown(self):
+        """等待关闭信号"""
+        while not self._shutdown_event.is_set():
+            self._update_status()
+            self._wake_event.wait(timeout=_STATUS_INTERVAL_MIN)
+            self._wake_event.clear()
+            self._drain_reload()
+    
+    def _reload_config(self):
+        """重载配置（热更新）"""
+        try:
+            logger.info("=" * 50)
+            logger.info("开始重载配置...")
+            
+            # 重新加载配置
+            config_manager = ConfigManager()
+            new_config = config_manager.load(force=True)
+            old_cron = self.config.cron
+            old_timezone = self.config.timezone
+            self.config = new_config
+            
+            logger.info(f"配置已重载: TZ={self.config.timezone}, NETWORK={self.config.network}")
+            logger.info(f"网络配置: {self.config.network}, Healthcheck: {self.config.show_healthcheck}, CapAdd: {self.config.show_cap_add}")
+            logger.info(f"环境过滤: {self.config.env_filter_keywords}")
+            
+            # CRON 表达式或时区变化时才重新调度任务，其余重载不动触发器
+            if old_cron != self.config.cron or old_timezone != self.config.timezone:
+                logger.info(f"CRON/时区变化: {old_cron}({old_timezone}) -> "
+                            f"{self.config.cron}({self.config.timezone})")
+                
+                # 检查是否为 manual 或 once 模式
+                if self.config.cron in ('manual', 'once'):
+                    logger.info(f"切换到 {self.config.cron} 模式，停止调度器")
+                    self.stop()
+                    return
+                
+                # 重新解析 CRON 表达式
+                new_trigger = self.parse_cron(self.config.cron)
+                if not new_trigger:
+                    logger.error(f"无效的 CRON 表达式: {self.config.cron}")
+                    return
+                
+                # 重新调度任务
+                if self.scheduler:
+                    try:
+                        # 移除旧任务
+                        self.scheduler.remove_job('d2c_backup')
+                        logger.info("已移除旧任务")
+                        
+                        # 添加新任务
+                        self.scheduler.add_job(
+                            self.run_task,
+                            trigger=new_trigger,
+                            id='d2c_backup',
+                            name='D2C Backup Task'
+                        )
+                        logger.info(f"已添加新任务，CRON: {self.config.cron}")
+                        
+                        # 获取下次执行时间
+                        job = self.scheduler.get_job('d2c_backup')
+                        if job and job.next_run_time:
+                            logger.info(f"下次执行时间: {job.next_run_time}")
+                    except Exception as e:
+                        logger.error(f"重新调度任务失败: {e}")
+                        return
+                
+                logger.info("调度器已更新")
+            else:
+                logger.info("CRON 表达式未变化，无需更新调度器")
+            
+            self._update_status()
+            logger.info("配置重载完成")
+            logger.info("=" * 50)
+            
+        except Exception as e:
+            logger.error(f"重载配置失败: {e}")
+
+
+# 存活检查的正向缓存：Web端会高频轮询状态，1秒内复用上次结果
+_pid_alive_cache = {'pid': None, 'deadline': 0.0}
+
+
+def _pid_alive(pid: int, use_cache: bool = True) -> bool:
+    """
+    检查进程是否存活
+
+    Linux下直接stat /proc/<pid>，不需要信号权限；命中为真的结果
+    缓存1秒，避免UI轮询逐次产生系统调用。等待进程退出等需要即时
+    结果的场景传 use_cache=False。
+    """
+    now = time.monotonic()
+    if use_cache and _pid_alive_cache['pid'] == pid and now < _pid_alive_cache['deadline']:
+        return True
+
+    if os.path.isdir('/proc'):
+        alive = os.path.exists(f'/proc/{pid}')
+    else:
+        try:
+            os.kill(pid, 0)
+            alive = True
+        except ProcessLookupError:
+            alive = False
+        except PermissionError:
+            alive = True
+
+    if alive:
+        _pid_alive_cache['pid'] = pid
+        _pid_alive_cache['deadline'] = now + 1.0
+    return alive
+
+
+def is_running() -> bool:
+    """检查调度器是否正在运行"""
+    if not PID_FILE.exists():
+        return False
+
+    try:
+        with open(PID_FILE, 'r') as f:
+            pid = int(f.read().strip())
+
+        # 检查进程是否存在
+        return _pid_alive(pid)
+    except (ValueError, FileNotFoundError):
+        return False
+
+
+def start_service(config_path: str = '/app/config/config.json'):
+    """启动调度器服务"""
+    import fcntl
+    
+    # 使用文件锁确保只有一个实例启动
+    lock_file = Path('/tmp/d2c_scheduler.lock')
+    try:
+        with open(lock_file, 'w') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            
+            if is_running():
+                logger.warning("调度器服务已在运行")
+                return
+            
+            logger.info(f"正在加载配置: {config_path}")
+            config_manager = ConfigManager(config_path)
+            config = config_manager.load()
+            
+            logger.info(f"配置加载完成: CRON={config.cron}, TZ={config.timezone}")
+            
+            service = SchedulerService(config)
+            service.start()
+            
+    except (IOError, OSError) as e:
+        logger.error(f"获取调度器锁失败: {e}")
+        raise
+
+
+def stop_service():
+    """停止调度器服务"""
+    if not PID_FILE.exists():
+        logger.info("调度器服务未运行")
+        return
+    
+    try:
+        with open(PID_FILE, 'r') as f:
+            pid = int(f.read().strip())
+        
+        os.kill(pid, signal.SIGTERM)
+        logger.info(f"已发送停止信号到进程 {pid}")
+        
+        # 等待进程退出（绕过存活缓存，即时感知退出）
+        for _ in range(10):
+            if not _pid_alive(pid, use_cache=False):
+                logger.info("调度器服务已停止")
+                return
+            time.sleep(0.5)
+        
+        # 强制终止
+        os.kill(pid, signal.SIGKILL)
+        logger.warning("强制终止调度器服务")
+        
+    except Exception as e:
+        logger.error(f"停止服务失败: {e}")
+
+
+def reload_service():
+    """重载调度器配置（发送 SIGHUP 信号）"""
+    if not PID_FILE.exists():
+        logger.info("调度器服务未运行，无需重载")
+        return False
+    
+    try:
+        with open(PID_FILE, 'r') as f:
+            pid = int(f.read().strip())
+        
+        # 检查进程是否存在
+        if not _pid_alive(pid, use_cache=False):
+            logger.warning("调度器进程不存在")
+            return False
+        
+        # 发送 SIGHUP 信号触发重载
+        os.kill(pid, signal.SIGHUP)
+        logger.info(f"已发送重载信号到进程 {pid}")
+        return True
+        
+    except Exception as e:
+        logger.error(f"重载服务失败: {e}")
+        return False
+
+
+def get_service_status() -> Dict[str, Any]:
+    """获取调度器服务状态"""
+    status = {
+        'running': False,
+        'pid': None,
+        'cron': None,
+        'started_at': None
+    }
+    
+    if STATUS_FILE.exists():
+        try:
+            with open(STATUS_FILE, 'rb') as f:
+                status = _json_loads(f.read())
+        except:
+            pass
+    
+    # 验证进程是否存在（UI高频轮询路径，走带缓存的检查）
+    if status.get('pid'):
+        status['running'] = _pid_alive(status['pid'])
+
+    return status
+
+
+def run_once_service(config_path: str = '/app/config/config.json'):
+    """立即执行一次任务（不启动调度器）"""
+    config_manager = ConfigManager(config_path)
+    config = config_manager.load()
+    
+    service = SchedulerService(config)
+    
+    # 直接运行任务
+    logger.info("执行立即运行任务...")
+    service.run_task()
+    logger.info("任务执行完成")
+
+
+if __name__ == '__main__':
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='D2C 调度器服务')
+    parser.add_argument('--config', '-c', default='/app/config/config.json')
+    parser.add_argument('action', choices=['start', 'stop', 'reload', 'status', 'run-once'], 
+                        default='start', nargs='?')
+    
+    args = parser.parse_args()
+    
+    if args.action == 'start':
+        start_service(args.config)
+    elif args.action == 'stop':
+        stop_service()
+    elif args.action == 'reload':
+        reload_service()
+    elif args.action == 'status':
+        status = get_service_status()
+        print(json.dumps(status, indent=2))
+    elif args.action == 'run-once':
+        run_once_service(args.config)
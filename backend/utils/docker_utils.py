@@ -1,284 +1,450 @@
-#!/usr/bin/env python3
-"""
-D2C Docker Utilities
-Docker 相关工具函数
-"""
-
-import json
-import subprocess
-from typing import Any, Dict, List, Optional, Tuple
-from pathlib import Path
-
-
-class DockerError(Exception):
-    """Docker 操作错误"""
-    pass
-
-
-def run_docker_command(command: str, 
-                       timeout: int = 30,
-                       check_socket: bool = True) -> Optional[str]:
-    """
-    执行 Docker 命令
-    
-    Args:
-        command: 命令字符串
-        timeout: 超时时间（秒）
-        check_socket: 是否检查 Docker socket
-    
-    Returns:
-        命令输出，失败返回 None
-    
-    Raises:
-        DockerError: Docker 连接错误
-    """
-    # 检查 Docker socket
-    if check_socket and not Path('/var/run/docker.sock').exists():
-        raise DockerError(
-            "未找到 Docker socket 挂载。"
-            "请确保容器启动时使用了 -v /var/run/docker.sock:/var/run/docker.sock"
-        )
-    
-    # 确保命令以 docker 开头
-    if not command.strip().startswith('docker'):
-        raise DockerError(f"不安全的命令: {command}")
-    
-    try:
-        # 使用 shlex 分割命令，避免 shell=True 的安全风险
-        import shlex
-        cmd_parts = shlex.split(command)
-        result = subprocess.run(
-            cmd_parts,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            shell=False,
-            text=True,
-            timeout=timeout
-        )
-        
-        if result.returncode != 0:
-            print(f"[ERROR] Docker命令执行失败: {command}")
-            print(f"[ERROR] 错误信息: {result.stderr}")
-            return None
-        
-        return result.stdout
-        
-    except subprocess.TimeoutExpired:
-        print(f"[ERROR] Docker命令执行超时: {command}")
-        return None
-    except Exception as e:
-        print(f"[ERROR] Docker命令执行异常: {e}")
-        return None
-
-
-def check_docker_connection() -> Tuple[bool, str]:
-    """
-    检查 Docker 连接状态
-    
-    Returns:
-        (是否成功, 状态信息)
-    """
-    # 检查 socket
-    if not Path('/var/run/docker.sock').exists():
-        return False, "Docker socket 未挂载"
-    
-    # 测试连接
-    output = run_docker_command('docker version --format "{{.Server.Version}}"', 
-                                check_socket=False)
-    
-    if output:
-        version = output.strip()
-        return True, f"Docker 版本: {version}"
-    
-    return False, "无法连接到 Docker daemon"
-
-
-def get_docker_info() -> Dict[str, Any]:
-    """
-    获取 Docker 系统信息
-    
-    Returns:
-        Docker 信息字典
-    """
-    output = run_docker_command('docker info --format "{{json .}}"')
-    
-    if output:
-        try:
-            return json.loads(output)
-        except json.JSONDecodeError as e:
-            print(f"[ERROR] 解析 Docker 信息失败: {e}")
-    
-    return {}
-
-
-def get_containers(all_containers: bool = True) -> List[Dict[str, Any]]:
-    """
-    获取容器列表
-    
-    Args:
-        all_containers: 是否获取所有容器（包括停止的）
-    
-    Returns:
-        容器信息列表
-    """
-    # 获取容器 ID 列表
-    format_str = "{{.ID}}"
-    filter_flag = "-a" if all_containers else ""
-    
-    cmd = f"docker ps {filter_flag} --format '{format_str}'"
-    output = run_docker_command(cmd)
-    
-    if not output:
-        return []
-    
-    container_ids = [cid.strip() for cid in output.strip().split('\n') if cid.strip()]
-    
-    if not container_ids:
-        return []
-    
-    # 批量获取所有容器详情（性能优化）
-    ids_str = ' '.join(container_ids)
-    inspect_output = run_docker_command(f'docker inspect {ids_str}')
-    
-    if not inspect_output:
-        return []
-    
-    try:
-        containers = json.loads(inspect_output)
-        return containers if containers else []
-    except json.JSONDecodeError as e:
-        print(f"[WARNING] 解析容器信息失败: {e}")
-        return []
-
-
-def get_networks() -> Dict[str, Dict[str, Any]]:
-    """
-    获取网络列表
-    
-    Returns:
-        网络名称到网络信息的映射
-    """
-    networks = {}
-    
-    # 获取网络 ID 列表
-    cmd = "docker network ls --format '{{.ID}}'"
-    output = run_docker_command(cmd)
-    
-    if not output:
-        return networks
-    
-    network_ids = [nid.strip() for nid in output.strip().split('\n') if nid.strip()]
-    
-    # 获取每个网络的详细信息
-    for network_id in network_ids:
-        inspect_output = run_docker_command(f'docker network inspect {network_id}')
-        
-        if inspect_output:
-            try:
-                network_info = json.loads(inspect_output)
-                if network_info and len(network_info) > 0:
-                    network_name = network_info[0].get('Name', '')
-                    networks[network_name] = network_info[0]
-            except json.JSONDecodeError as e:
-                print(f"[WARNING] 解析网络 {network_id} 信息失败: {e}")
-    
-    return networks
-
-
-def get_volumes() -> List[Dict[str, Any]]:
-    """
-    获取卷列表
-    
-    Returns:
-        卷信息列表
-    """
-    volumes = []
-    
-    # 获取卷列表
-    cmd = "docker volume ls --format '{{.Name}}'"
-    output = run_docker_command(cmd)
-    
-    if not output:
-        return volumes
-    
-    volume_names = [v.strip() for v in output.strip().split('\n') if v.strip()]
-    
-    # 获取每个卷的详细信息
-    for volume_name in volume_names:
-        inspect_output = run_docker_command(f'docker volume inspect {volume_name}')
-        
-        if inspect_output:
-            try:
-                volume_info = json.loads(inspect_output)
-                if volume_info and len(volume_info) > 0:
-                    volumes.append(volume_info[0])
-            except json.JSONDecodeError as e:
-                print(f"[WARNING] 解析卷 {volume_name} 信息失败: {e}")
-    
-    return volumes
-
-
-def container_name_to_id(name: str) -> Optional[str]:
-    """
-    将容器名称转换为 ID
-    
-    Args:
-        name: 容器名称或短 ID
-    
-    Returns:
-        完整容器 ID，失败返回 None
-    """
-    output = run_docker_command(
-        f'docker ps -a --filter "name={name}" --format "{{{{.ID}}}}"'
-    )
-    
-    if output:
-        return output.strip().split('\n')[0] if output.strip() else None
-    
-    return None
-
-
-def get_container_logs(container_id: str, 
-                       tail: int = 100,
-                       timestamps: bool = False) -> str:
-    """
-    获取容器日志
-    
-    Args:
-        container_id: 容器 ID
-        tail: 获取最后多少行
-        timestamps: 是否包含时间戳
-    
-    Returns:
-        日志内容
-    """
-    ts_flag = "-t" if timestamps else ""
-    cmd = f'docker logs {ts_flag} --tail {tail} {container_id}'
-    
-    output = run_docker_command(cmd)
-    return output or ""
-
-
-if __name__ == '__main__':
-    # 测试 Docker 工具
-    print("检查 Docker 连接:")
-    connected, info = check_docker_connection()
-    print(f"  状态: {'已连接' if connected else '未连接'}")
-    print(f"  信息: {info}")
-    
-    if connected:
-        print("\n获取容器列表:")
-        containers = get_containers()
-        print(f"  找到 {len(containers)} 个容器")
-        
-        for c in containers[:3]:  # 只显示前3个
-            name = c.get('Name', 'unknown').lstrip('/')
-            image = c.get('Config', {}).get('Image', 'unknown')
-            print(f"    - {name} ({image})")
-        
-        print("\n获取网络列表:")
-        networks = get_networks()
-        print(f"  找到 {len(networks)} 个网络")
-        
-        for name in list(networks.keys())[:3]:
-            print(f"    - {name}")
+#!/usr/bin/env python3
+"""
+D2C Docker Utilities
+Docker 相关工具函数
+"""
+
+import http.client
+import json
+import shlex
+import shutil
+import socket
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union
+from pathlib import Path
+
+# orjson解析大块inspect输出比标准库快数倍，且直接消费bytes；未安装时回退
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+
+class DockerError(Exception):
+    """Docker 操作错误"""
+    pass
+
+
+# Docker 守护进程套接字路径
+DOCKER_SOCK = Path('/var/run/docker.sock')
+
+# docker可执行文件路径，导入时解析一次，每次调用省掉PATH查找
+_DOCKER_BIN = shutil.which('docker') or 'docker'
+
+# 直连API时并发inspect的线程数上限；进程级共享的线程池，
+# 工作线程常驻，线程本地的daemon连接随之跨调用复用
+_INSPECT_WORKERS = 16
+_INSPECT_POOL = ThreadPoolExecutor(max_workers=_INSPECT_WORKERS,
+                                   thread_name_prefix='docker-inspect')
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """通过UNIX套接字直连Docker守护进程的HTTP连接"""
+
+    def __init__(self, sock_path: str = str(DOCKER_SOCK), timeout: int = 30):
+        super().__init__('localhost', timeout=timeout)
+        self._sock_path = sock_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._sock_path)
+        self.sock = sock
+
+
+# 每线程持有一条keep-alive连接，跨请求复用，免去每次API调用的
+# connect/close握手；线程退出时连接随之回收
+_conn_local = threading.local()
+
+
+def _discard_connection():
+    """丢弃当前线程的缓存连接（连接已失效时调用）"""
+    conn = getattr(_conn_local, 'conn', None)
+    if conn is not None:
+        _conn_local.conn = None
+        try:
+            conn.close()
+        except OSError:
+            pass
+
+
+def _docker_api_get(path: str) -> Optional[Any]:
+    """
+    直接请求 Docker Engine API
+
+    省掉每次调用fork+exec docker CLI的开销；复用线程本地的
+    keep-alive连接，连接陈旧失效时换新连接重试一次。失败时返回
+    None，由调用方回退到CLI路径。
+
+    Args:
+        path: API路径，如 '/containers/json?all=1'
+
+    Returns:
+        解析后的JSON对象，套接字不可用或请求失败时返回 None
+    """
+    if not DOCKER_SOCK.exists():
+        return None
+    for retry in (True, False):
+        conn = getattr(_conn_local, 'conn', None)
+        if conn is None:
+            conn = _conn_local.conn = _UnixHTTPConnection()
+        try:
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            # 响应体必须读完，连接才能留给下一次请求复用
+            body = resp.read()
+            if resp.status != 200:
+                return None
+            return _json_loads(body)
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            _discard_connection()
+            if not retry:
+                print(f"[WARNING] Docker API请求失败({path}): {e}")
+                return None
+
+
+def run_docker_command(command: Union[str, List[str]],
+                       timeout: int = 30,
+                       check_socket: bool = True,
+                       binary: bool = False) -> Optional[Union[str, bytes]]:
+    """
+    执行 Docker 命令
+
+    Args:
+        command: 命令字符串，或已分好的参数列表（跳过shlex解析，
+                 适合批量inspect等参数可能很多的场景）
+        timeout: 超时时间（秒）
+        check_socket: 是否检查 Docker socket
+        binary: 为True时返回原始bytes，不做整块UTF-8解码——
+                批量inspect的MB级JSON直接交给解析器即可
+
+    Returns:
+        命令输出（str或bytes），失败返回 None
+
+    Raises:
+        DockerError: Docker 连接错误
+    """
+    # 检查 Docker socket
+    if check_socket and not DOCKER_SOCK.exists():
+        raise DockerError(
+            "未找到 Docker socket 挂载。"
+            "请确保容器启动时使用了 -v /var/run/docker.sock:/var/run/docker.sock"
+        )
+
+    # 列表形式直接作为argv使用；字符串形式用shlex分割，避免shell=True
+    if isinstance(command, str):
+        cmd_parts = shlex.split(command)
+    else:
+        cmd_parts = command
+
+    # 确保命令以 docker 开头
+    if not cmd_parts or cmd_parts[0] != 'docker':
+        raise DockerError(f"不安全的命令: {command}")
+
+    try:
+        # argv[0]换成解析好的绝对路径；无preexec_fn时subprocess底层
+        # 走posix_spawn，免去fork复制父进程地址空间
+        result = subprocess.run(
+            [_DOCKER_BIN] + cmd_parts[1:],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=False,
+            text=not binary,
+            timeout=timeout
+        )
+
+        if result.returncode != 0:
+            stderr = result.stderr
+            if binary and isinstance(stderr, bytes):
+                stderr = stderr.decode('utf-8', errors='replace')
+            print(f"[ERROR] Docker命令执行失败: {command}")
+            print(f"[ERROR] 错误信息: {stderr}")
+            return None
+
+        return result.stdout
+        
+    except subprocess.TimeoutExpired:
+        print(f"[ERROR] Docker命令执行超时: {command}")
+        return None
+    except Exception as e:
+        print(f"[ERROR] Docker命令执行异常: {e}")
+        return None
+
+
+def check_docker_connection() -> Tuple[bool, str]:
+    """
+    检查 Docker 连接状态
+    
+    Returns:
+        (是否成功, 状态信息)
+    """
+    # 检查 socket
+    if not DOCKER_SOCK.exists():
+        return False, "Docker socket 未挂载"
+
+    # 优先直连API：一次 GET /version，无子进程开销
+    version_info = _docker_api_get('/version')
+    if version_info and version_info.get('Version'):
+        return True, f"Docker 版本: {version_info['Version']}"
+
+    # API不可用时回退CLI
+    output = run_docker_command(['docker', 'version', '--format', '{{.Server.Version}}'],
+                                check_socket=False)
+
+    if output:
+        version = output.strip()
+        return True, f"Docker 版本: {version}"
+
+    return False, "无法连接到 Docker daemon"
+
+
+def get_docker_info() -> Dict[str, Any]:
+    """
+    获取 Docker 系统信息
+    
+    Returns:
+        Docker 信息字典
+    """
+    output = run_docker_command(['docker', 'info', '--format', '{{json .}}'])
+    
+    if output:
+        try:
+            return _json_loads(output)
+        except ValueError as e:
+            print(f"[ERROR] 解析 Docker 信息失败: {e}")
+    
+    return {}
+
+
+def get_containers(all_containers: bool = True) -> List[Dict[str, Any]]:
+    """
+    获取容器列表
+    
+    Args:
+        all_containers: 是否获取所有容器（包括停止的）
+    
+    Returns:
+        容器信息列表
+    """
+    # 优先直连API：列表一次请求，逐容器inspect走线程池并发（I/O密集，
+    # 等待期间GIL释放），全程无fork/exec
+    all_flag = '1' if all_containers else '0'
+    listed = _docker_api_get(f'/containers/json?all={all_flag}')
+    if listed is not None:
+        results = _INSPECT_POOL.map(
+            lambda entry: _docker_api_get(f"/containers/{entry['Id']}/json"),
+            listed)
+        return [info for info in results if info]
+
+    # API不可用时回退CLI：先拿ID列表再批量inspect
+    cmd = ['docker', 'ps'] + (['-a'] if all_containers else []) + ['--format', '{{.ID}}']
+    output = run_docker_command(cmd)
+    
+    if not output:
+        return []
+    
+    container_ids = [cid.strip() for cid in output.strip().split('\n') if cid.strip()]
+    
+    if not container_ids:
+        return []
+    
+    # 批量获取所有容器详情（性能优化）；列表argv免去拼接再shlex分割，
+    # bytes直接交给json解析，不做整块str解码
+    inspect_output = run_docker_command(['docker', 'inspect'] + container_ids,
+                                        binary=True)
+    
+    if not inspect_output:
+        return []
+    
+    try:
+        containers = _json_loads(inspect_output)
+        return containers if containers else []
+    except ValueError as e:
+        print(f"[WARNING] 解析容器信息失败: {e}")
+        return []
+
+
+def get_networks() -> Dict[str, Dict[str, Any]]:
+    """
+    获取网络列表
+    
+    Returns:
+        网络名称到网络信息的映射
+    """
+    networks = {}
+
+    # 优先直连API：GET /networks 一次请求即带回全部网络的详细字段
+    network_infos = _docker_api_get('/networks')
+    if network_infos is not None:
+        for network_info in network_infos:
+            networks[network_info.get('Name', '')] = network_info
+        return networks
+
+    # API不可用时回退CLI：拿ID列表再批量inspect
+    cmd = ['docker', 'network', 'ls', '--format', '{{.ID}}']
+    output = run_docker_command(cmd)
+    
+    if not output:
+        return networks
+    
+    network_ids = [nid.strip() for nid in output.strip().split('\n') if nid.strip()]
+
+    if not network_ids:
+        return networks
+
+    # 批量获取所有网络详情：inspect接受多个ID，一次子进程+一次daemon往返
+    inspect_output = run_docker_command(
+        ['docker', 'network', 'inspect'] + network_ids, binary=True
+    )
+
+    if inspect_output:
+        try:
+            for network_info in _json_loads(inspect_output):
+                networks[network_info.get('Name', '')] = network_info
+        except ValueError as e:
+            print(f"[WARNING] 解析网络信息失败: {e}")
+
+    return networks
+
+
+def get_volumes() -> List[Dict[str, Any]]:
+    """
+    获取卷列表
+    
+    Returns:
+        卷信息列表
+    """
+    volumes = []
+
+    # 优先直连API：GET /volumes 一次请求返回全部卷的详细信息
+    volume_resp = _docker_api_get('/volumes')
+    if volume_resp is not None:
+        return volume_resp.get('Volumes') or []
+
+    # API不可用时回退CLI：拿名称列表再批量inspect
+    cmd = ['docker', 'volume', 'ls', '--format', '{{.Name}}']
+    output = run_docker_command(cmd)
+    
+    if not output:
+        return volumes
+    
+    volume_names = [v.strip() for v in output.strip().split('\n') if v.strip()]
+
+    if not volume_names:
+        return volumes
+
+    # 批量获取所有卷详情，与网络inspect同样一次调用完成
+    inspect_output = run_docker_command(
+        ['docker', 'volume', 'inspect'] + volume_names, binary=True
+    )
+
+    if inspect_output:
+        try:
+            volumes = _json_loads(inspect_output)
+        except ValueError as e:
+            print(f"[WARNING] 解析卷信息失败: {e}")
+
+    return volumes
+
+
+def build_name_to_id_map(containers: List[Dict[str, Any]]) -> Dict[str, str]:
+    """
+    从容器列表构建名称到完整ID的映射
+
+    get_containers 的结果已包含 Name 字段，建一次映射后名称解析
+    都在内存完成，不再逐名称起 docker ps 子进程。
+
+    Args:
+        containers: get_containers 返回的容器列表
+
+    Returns:
+        名称（无前导斜杠）到完整ID的映射
+    """
+    return {c['Name'].removeprefix('/'): c['Id']
+            for c in containers if c.get('Name')}
+
+
+def resolve_container_id(name: str,
+                         name_to_id: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    将容器名称解析为完整 ID
+
+    Args:
+        name: 容器名称
+        name_to_id: build_name_to_id_map 的结果；不传时回退到CLI查询
+
+    Returns:
+        完整容器 ID，未找到返回 None
+    """
+    if name_to_id is not None:
+        return name_to_id.get(name)
+    return container_name_to_id(name)
+
+
+def container_name_to_id(name: str) -> Optional[str]:
+    """
+    将容器名称转换为 ID
+    
+    Args:
+        name: 容器名称或短 ID
+    
+    Returns:
+        完整容器 ID，失败返回 None
+    """
+    output = run_docker_command(
+        ['docker', 'ps', '-a', '--filter', f'name={name}', '--format', '{{.ID}}']
+    )
+    
+    if output:
+        return output.strip().split('\n')[0] if output.strip() else None
+    
+    return None
+
+
+def get_container_logs(container_id: str, 
+                       tail: int = 100,
+                       timestamps: bool = False) -> str:
+    """
+    获取容器日志
+    
+    Args:
+        container_id: 容器 ID
+        tail: 获取最后多少行
+        timestamps: 是否包含时间戳
+    
+    Returns:
+        日志内容
+    """
+    cmd = ['docker', 'logs'] + (['-t'] if timestamps else []) \
+        + ['--tail', str(tail), container_id]
+
+    output = run_docker_command(cmd)
+    return output or ""
+
+
+if __name__ == '__main__':
+    # 测试 Docker 工具
+    print("检查 Docker 连接:")
+    connected, info = check_docker_connection()
+    print(f"  状态: {'已连接' if connected else '未连接'}")
+    print(f"  信息: {info}")
+    
+    if connected:
+        print("\n获取容器列表:")
+        containers = get_containers()
+        print(f"  找到 {len(containers)} 个容器")
+        
+        for c in containers[:3]:  # 只显示前3个
+            name = c.get('Name', 'unknown').lstrip('/')
+            image = c.get('Config', {}).get('Image', 'unknown')
+            print(f"    - {name} ({image})")
+        
+        print("\n获取网络列表:")
+        networks = get_networks()
+        print(f"  找到 {len(networks)} 个网络")
+        
+        for name in list(networks.keys())[:3]:
+            print(f"    - {name}")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+D2C 执行日志存储
+JSON Lines 格式的任务执行记录，调度器进程写入，Web 进程读取
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List
+
+# orjson的序列化/解析均为C实现且原生输出UTF-8；未安装时回退标准库
+try:
+    import orjson
+
+    def _dumps_line(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps_line(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+    _loads = json.loads
+
+# 执行日志文件（每行一条JSON记录，追加写入）
+LOG_FILE = Path('/app/logs/executions.jsonl')
+
+# 旧版整文件JSON数组格式，读取时兼容
+LEGACY_LOG_FILE = Path('/app/logs/executions.json')
+
+# 保留的最大记录数
+MAX_RECORDS = 100
+
+# 文件超过该大小时才做一次截断重写（约为上限记录量的数倍余量）
+_TRUNCATE_THRESHOLD = 256 * 1024
+
+# 单条记录的尺寸上界估计（实际记录约150字节），tail读取块按其计算
+_APPROX_RECORD_SIZE = 512
+
+
+def append_execution(record: Dict[str, Any]):
+    """
+    追加一条执行记录
+
+    每次执行只做一次O(1)的行追加，不再整读整写；文件增长超过
+    阈值时才重写为最近 MAX_RECORDS 条。
+
+    Args:
+        record: 执行记录字典
+    """
+    LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(LOG_FILE, 'a', encoding='utf-8') as f:
+        f.write(_dumps_line(record) + '\n')
+
+    # 懒截断：大多数追加直接返回，偶尔一次重写控制文件大小
+    try:
+        if LOG_FILE.stat().st_size > _TRUNCATE_THRESHOLD:
+            lines = LOG_FILE.read_text(encoding='utf-8').splitlines(keepends=True)
+            LOG_FILE.write_text(''.join(lines[-MAX_RECORDS:]), encoding='utf-8')
+    except OSError:
+        pass
+
+
+def read_executions(limit: int = MAX_RECORDS) -> List[Dict[str, Any]]:
+    """
+    读取最近的执行记录（新记录在前）
+
+    Args:
+        limit: 返回的最大记录数
+
+    Returns:
+        执行记录列表
+    """
+    if LOG_FILE.exists():
+        records = []
+        # 新记录在文件尾部：从末尾回退一个足够覆盖limit条的块读取，
+        # 读取量与limit成正比，和历史文件大小无关
+        chunk = limit * _APPROX_RECORD_SIZE
+        try:
+            with open(LOG_FILE, 'rb') as f:
+                size = f.seek(0, 2)
+                f.seek(max(0, size - chunk))
+                data = f.read()
+        except OSError:
+            return []
+        lines = data.decode('utf-8', errors='replace').splitlines()
+        if size > chunk and lines:
+            # 块边界可能落在行中间，丢弃可能残缺的首行
+            lines = lines[1:]
+        # 文件按时间顺序追加，取末尾limit行后倒序即新记录在前
+        for line in reversed(lines[-limit:]):
+            if not line:
+                continue
+            try:
+                records.append(_loads(line))
+            except ValueError:
+                continue
+        return records
+
+    # 兼容旧版整文件JSON数组（数组本身已是新记录在前）
+    if LEGACY_LOG_FILE.exists():
+        try:
+            with open(LEGACY_LOG_FILE, 'r', encoding='utf-8') as f:
+                return json.load(f)[:limit]
+        except (OSError, json.JSONDecodeError):
+            return []
+
+    return []
+
+
+def clear_executions():
+    """清空执行日志（新旧两种格式一并清理）"""
+    for path in (LOG_FILE, LEGACY_LOG_FILE):
+        try:
+            if path.exists():
+                path.unlink()
+        except OSError:
+            pass
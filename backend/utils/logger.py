@@ -6,33 +6,100 @@ D2C 日志工具模块 - 生产级日志配置
 
 import os
 import sys
+import atexit
+import queue
 import logging
 import logging.handlers
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+
+
+class _CountingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    进程内计数字节数判断轮转的 RotatingFileHandler
+
+    标准实现每条日志都 seek+tell 向内核询问文件大小；日志文件由本
+    进程独占写入，打开时读一次初始大小、之后在内存累加即可，
+    每条日志省掉两次系统调用。
+    """
+
+    # 置True后每条记录不再单独flush，交由监听线程在空闲时批量冲刷，
+    # 连续的日志合并进io缓冲、以更少更大的write落盘
+    defer_flush = False
+
+    def flush(self):
+        if not self.defer_flush:
+            super().flush()
+
+    def flush_buffered(self):
+        """冲刷io缓冲中积累的记录（由监听线程在空闲时调用）"""
+        logging.StreamHandler.flush(self)
+
+    def _open(self):
+        stream = super()._open()
+        try:
+            self._written = os.fstat(stream.fileno()).st_size
+        except OSError:
+            self._written = 0
+        return stream
+
+    def shouldRollover(self, record) -> bool:
+        if self.maxBytes <= 0:
+            return False
+        if self.stream is None:
+            self.stream = self._open()
+        # 与标准实现同样按格式化后的长度估算，轮转后_open重置计数
+        msg = "%s\n" % self.format(record)
+        self._written += len(msg)
+        return self._written >= self.maxBytes
+
+
+class _BatchingQueueListener(logging.handlers.QueueListener):
+    """
+    空闲时才冲刷文件处理器的队列监听线程
+
+    日志突发时各记录只写入io缓冲，队列安静下来（50ms无新记录）
+    或缓冲写满时才真正落盘，把一串write系统调用合并成少数几次。
+    """
+
+    _IDLE_FLUSH_TIMEOUT = 0.05
+
+    def _monitor(self):
+        q = self.queue
+        has_task_done = hasattr(q, 'task_done')
+        while True:
+            try:
+                record = q.get(timeout=self._IDLE_FLUSH_TIMEOUT)
+            except queue.Empty:
+                self._flush_deferred()
+                continue
+            if record is self._sentinel:
+                if has_task_done:
+                    q.task_done()
+                break
+            self.handle(record)
+            if has_task_done:
+                q.task_done()
+        self._flush_deferred()
+
+    def _flush_deferred(self):
+        for handler in self.handlers:
+            if getattr(handler, 'defer_flush', False):
+                try:
+                    handler.flush_buffered()
+                except Exception:
+                    pass
 
 
 class D2CLogger:
-    """D2C 日志管理器 - 单例模式"""
-    
-    _instance = None
-    _initialized = False
-    
-    def __new__(cls, *args, **kwargs):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
-    
-    def __init__(self, 
+    """D2C 日志管理器（全局实例由 get_logger 提供）"""
+
+    def __init__(self,
                  name: str = "D2C",
                  log_dir: str = '/app/logs',
                  level: int = logging.INFO,
                  max_bytes: int = 10 * 1024 * 1024,  # 10MB
                  backup_count: int = 5):
-        if D2CLogger._initialized:
-            return
-            
         self.name = name
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
@@ -41,7 +108,6 @@ class D2CLogger:
         self.backup_count = backup_count
         
         self._setup_logger()
-        D2CLogger._initialized = True
     
     def _setup_logger(self):
         """配置日志记录器"""
@@ -60,7 +126,7 @@ class D2CLogger:
         )
         
         # 文件处理器 - 带轮转
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = _CountingRotatingFileHandler(
             self.log_dir / 'd2c.log',
             maxBytes=self.max_bytes,
             backupCount=self.backup_count,
@@ -68,9 +134,10 @@ class D2CLogger:
         )
         file_handler.setLevel(self.level)
         file_handler.setFormatter(formatter)
+        file_handler.defer_flush = True
         
         # 错误日志单独文件
-        error_handler = logging.handlers.RotatingFileHandler(
+        error_handler = _CountingRotatingFileHandler(
             self.log_dir / 'd2c.error.log',
             maxBytes=self.max_bytes,
             backupCount=self.backup_count,
@@ -78,15 +145,33 @@ class D2CLogger:
         )
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
+        error_handler.defer_flush = True
         
         # 控制台处理器
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(self.level)
         console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(error_handler)
-        self.logger.addHandler(console_handler)
+
+        # 异步日志：调用方只做一次O(1)入队，格式化、轮转检查和磁盘
+        # 写入都在监听线程完成，请求路径不再阻塞在文件I/O上
+        log_queue: queue.Queue = queue.Queue(-1)
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+
+        self._listener = _BatchingQueueListener(
+            log_queue,
+            file_handler, error_handler, console_handler,
+            respect_handler_level=True
+        )
+        self._listener.start()
+        # 进程退出时停止监听线程并冲刷剩余日志
+        atexit.register(self._stop_listener)
+
+    def _stop_listener(self):
+        """停止监听线程（重复调用安全）"""
+        try:
+            self._listener.stop()
+        except AttributeError:
+            pass  # 已经停止
     
     def debug(self, msg: str, *args, **kwargs):
         self.logger.debug(msg, *args, **kwargs)
@@ -106,41 +191,26 @@ class D2CLogger:
     def set_level(self, level: int):
         """设置日志级别"""
         self.logger.setLevel(level)
-        for handler in self.logger.handlers:
+        # 真实的输出处理器挂在监听线程上
+        for handler in self._listener.handlers:
             handler.setLevel(level)
 
 
-# 全局日志实例
-_logger_instance: Optional[D2CLogger] = None
+# 全局日志实例（导入时构建一次；所有调用方本来就在模块导入时取它）
+_logger_instance = D2CLogger()
 
 
 def get_logger() -> D2CLogger:
     """获取全局日志实例"""
-    global _logger_instance
-    if _logger_instance is None:
-        _logger_instance = D2CLogger()
     return _logger_instance
 
 
-# 便捷函数
-def debug(msg: str, *args, **kwargs):
-    get_logger().debug(msg, *args, **kwargs)
-
-
-def info(msg: str, *args, **kwargs):
-    get_logger().info(msg, *args, **kwargs)
-
-
-def warning(msg: str, *args, **kwargs):
-    get_logger().warning(msg, *args, **kwargs)
-
-
-def error(msg: str, *args, **kwargs):
-    get_logger().error(msg, *args, **kwargs)
-
-
-def critical(msg: str, *args, **kwargs):
-    get_logger().critical(msg, *args, **kwargs)
+# 便捷函数：直接绑定底层logger的方法，每次调用省掉两层转发帧
+debug = _logger_instance.logger.debug
+info = _logger_instance.logger.info
+warning = _logger_instance.logger.warning
+error = _logger_instance.logger.error
+critical = _logger_instance.logger.critical
 
 
 # 抑制第三方库的日志
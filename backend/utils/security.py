@@ -6,8 +6,12 @@ D2C Security Utilities
 
 import os
 import re
+import shlex
+import time
+from collections import deque
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
 
 
 class SecurityError(Exception):
@@ -15,6 +19,51 @@ class SecurityError(Exception):
     pass
 
 
+# 热路径正则模块级编译一次，绕过re模块的每次调用缓存查找
+_DANGEROUS_CHARS_RE = re.compile(r'[/\\<>:"|?*\x00-\x1f]')
+_DEFAULT_ALLOWED_RE = re.compile(r'[^a-zA-Z0-9_.\-]')
+
+# 删除所有合法字符的转换表：translate后剩空串即全部字符合法，
+# 一次C调用完成校验，不进正则引擎
+_HEX_STRIP = str.maketrans('', '', '0123456789abcdef')
+_CRON_STRIP = str.maketrans('', '', '0123456789*/,-? ')
+_SHELL_SAFE_STRIP = str.maketrans(
+    '', '', 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_.-/'
+)
+
+
+def _build_sanitize_table() -> dict:
+    """合并文件名清理的两遍正则为一张ASCII转换表：危险字符删除，
+    其余非白名单字符替换为下划线"""
+    table = {}
+    for cp in range(128):
+        ch = chr(cp)
+        if cp < 0x20 or ch in '/\\<>:"|?*':
+            table[cp] = None
+        elif not (ch.isalnum() or ch in '_.-'):
+            table[cp] = '_'
+    return table
+
+
+_SANITIZE_TABLE = _build_sanitize_table()
+
+
+@lru_cache(maxsize=32)
+def _compile_allowed_pattern(pattern: str):
+    """编译调用方自定义的允许字符模式（带缓存）"""
+    return re.compile(pattern)
+
+
+@lru_cache(maxsize=32)
+def _resolved_base(base_path: str) -> Path:
+    """解析基路径（带缓存）
+
+    允许的基路径是少量固定值，resolve()的lstat系统调用和Path
+    分配只在首次发生，之后的每次校验直接取缓存结果。
+    """
+    return Path(base_path).resolve()
+
+
 def validate_path(file_path: str, 
                   allowed_base_paths: list[str],
                   allow_absolute: bool = True) -> Path:
@@ -42,7 +91,7 @@ def validate_path(file_path: str,
     # 检查路径是否在允许的基路径下
     allowed = False
     for base_path in allowed_base_paths:
-        base = Path(base_path).resolve()
+        base = _resolved_base(base_path)
         try:
             # 检查 path 是否是 base 的子路径
             path.relative_to(base)
@@ -71,15 +120,18 @@ def sanitize_filename(filename: str,
     Returns:
         清理后的文件名
     """
-    # 默认只允许字母、数字、下划线、连字符和点
-    if allowed_pattern is None:
-        allowed_pattern = r'[^a-zA-Z0-9_.\-]'
-    
-    # 移除路径分隔符和危险字符
-    sanitized = re.sub(r'[/\\<>:"|?*\x00-\x1f]', '', filename)
-    
-    # 应用自定义模式
-    sanitized = re.sub(allowed_pattern, '_', sanitized)
+    # 默认模式且纯ASCII时一次translate完成删除+替换两遍工作
+    if allowed_pattern is None and filename.isascii():
+        sanitized = filename.translate(_SANITIZE_TABLE)
+    else:
+        allowed_re = (_DEFAULT_ALLOWED_RE if allowed_pattern is None
+                      else _compile_allowed_pattern(allowed_pattern))
+
+        # 移除路径分隔符和危险字符
+        sanitized = _DANGEROUS_CHARS_RE.sub('', filename)
+
+        # 应用自定义模式
+        sanitized = allowed_re.sub('_', sanitized)
     
     # 移除前导和尾随的点和空格
     sanitized = sanitized.strip('. ')
@@ -108,10 +160,10 @@ def validate_container_id(container_id: str) -> bool:
     """
     if not container_id:
         return False
-    
+
     # Docker 容器 ID 是 64 位十六进制字符串，通常使用短 ID（12 位）
-    pattern = r'^[a-f0-9]{12,64}$'
-    return bool(re.match(pattern, container_id.lower()))
+    cid = container_id.lower()
+    return 12 <= len(cid) <= 64 and not cid.translate(_HEX_STRIP)
 
 
 def validate_cron_expression(cron_expr: str) -> Tuple[bool, str]:
@@ -131,10 +183,9 @@ def validate_cron_expression(cron_expr: str) -> Tuple[bool, str]:
     if len(parts) not in [5, 6]:
         return False, f"CRON表达式必须是5位或6位格式，当前: {len(parts)}位"
     
-    # 基本字符验证
-    valid_chars = set('0123456789*/,-? ')
+    # 基本字符验证：translate删掉全部合法字符，有剩余即含非法字符
     for i, part in enumerate(parts):
-        if not all(c in valid_chars for c in part):
+        if part.translate(_CRON_STRIP):
             return False, f"第{i+1}个字段包含无效字符: {part}"
     
     return True, ""
@@ -150,52 +201,63 @@ def escape_shell_arg(arg: str) -> str:
     Returns:
         转义后的参数
     """
-    # 如果参数包含特殊字符，使用单引号包裹
-    if re.search(r'[^a-zA-Z0-9_.\-/]', arg):
-        # 将单引号替换为 '\'' 以安全地包裹
-        return "'" + arg.replace("'", "'\\''") + "'"
-    return arg
+    # 常见的安全参数走translate快速路径，不进引用逻辑
+    if arg and not arg.translate(_SHELL_SAFE_STRIP):
+        return arg
+
+    # 含特殊字符（或为空）时交给shlex.quote做单引号包裹
+    return shlex.quote(arg)
 
 
 class RateLimiter:
-    """简单的内存速率限制器"""
-    
+    """简单的内存速率限制器（滑动窗口，每次判定O(1)）"""
+
+    # 每处理这么多次请求后清理一轮闲置的key，防止扫描流量撑大字典
+    _PURGE_EVERY = 1024
+
     def __init__(self, max_requests: int = 100, window_seconds: int = 60):
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = {}
-    
+        self.requests: Dict[str, deque] = {}
+        self._calls_since_purge = 0
+
     def is_allowed(self, key: str) -> bool:
         """
         检查是否允许请求
-        
+
         Args:
             key: 标识符（如 IP 地址）
-        
+
         Returns:
             是否允许
         """
-        import time
-        
         now = time.time()
-        
-        # 清理过期的请求记录
-        if key in self.requests:
-            self.requests[key] = [
-                t for t in self.requests[key] 
-                if now - t < self.window_seconds
-            ]
-        else:
-            self.requests[key] = []
-        
-        # 检查是否超过限制
-        if len(self.requests[key]) >= self.max_requests:
+
+        self._calls_since_purge += 1
+        if self._calls_since_purge >= self._PURGE_EVERY:
+            self._purge_idle(now)
+
+        bucket = self.requests.get(key)
+        if bucket is None:
+            # maxlen只保留最近max_requests个时间戳，append自动淘汰最旧的
+            bucket = self.requests[key] = deque(maxlen=self.max_requests)
+
+        # 窗口内已有max_requests个请求（即最旧的那个仍未过期）则拒绝
+        if len(bucket) >= self.max_requests and now - bucket[0] < self.window_seconds:
             return False
-        
+
         # 记录本次请求
-        self.requests[key].append(now)
+        bucket.append(now)
         return True
 
+    def _purge_idle(self, now: float):
+        """移除整个窗口内无请求的key"""
+        self._calls_since_purge = 0
+        idle = [key for key, bucket in self.requests.items()
+                if not bucket or now - bucket[-1] >= self.window_seconds]
+        for key in idle:
+            del self.requests[key]
+
 
 if __name__ == '__main__':
     # 测试安全工具
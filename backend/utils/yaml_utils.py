@@ -4,15 +4,23 @@ D2C YAML Utilities
 YAML 处理和格式化工具
 """
 
+import os
 import re
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 import yaml
 
+# 置 STRICT_YAML=1 可强制走 PyYAML Dumper 路径（回归对照用）
+_STRICT_YAML = os.environ.get('STRICT_YAML') == '1'
+
 
 class MyDumper(yaml.Dumper):
     """
     自定义 YAML Dumper 类
     确保正确的缩进和格式
+
+    注意：不能换成libyaml的CDumper/CSafeDumper——C发射器不会回调
+    Python层的increase_indent/write_line_break，列表项会失去缩进、
+    顶级键之间也不再有空行（实测输出不同）。
     """
     
     def increase_indent(self, flow: bool = False, indentless: bool = False):
@@ -25,6 +33,122 @@ class MyDumper(yaml.Dumper):
             super().write_line_break()
 
 
+class _FastDumpUnsupported(Exception):
+    """值超出快速发射器支持的子集，需回退 PyYAML"""
+    pass
+
+
+# 与 represent_str 的特殊字符列表一致
+_SPECIAL_CHARS_RE = re.compile(r'[:#{}\[\],&*?|\-<>=!%@`"\']')
+_QUOTE_PREFIXES = ('true', 'false', 'yes', 'no', 'on', 'off', 'null')
+
+# 复用 PyYAML 自身的隐式类型解析器判断裸标量是否会被误读
+_RESOLVER = yaml.resolver.Resolver()
+_STR_TAG = 'tag:yaml.org,2002:str'
+
+
+def _format_scalar(value: Any) -> str:
+    """按 MyDumper/represent_str 的规则格式化标量，超出子集时抛异常"""
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        text = repr(value)
+        # 科学计数/inf/nan 的表示与 PyYAML 有差异，交回退路径
+        if 'e' in text or 'n' in text or 'f' in text:
+            raise _FastDumpUnsupported
+        return text
+    if not isinstance(value, str):
+        raise _FastDumpUnsupported
+
+    if not value:
+        return "''"
+    if '\n' in value or not value.isprintable():
+        raise _FastDumpUnsupported
+    if _SPECIAL_CHARS_RE.search(value) or value.startswith(_QUOTE_PREFIXES):
+        # 双引号风格；含引号/反斜杠需要转义规则，交回退路径
+        if '"' in value or '\\' in value:
+            raise _FastDumpUnsupported
+        return f'"{value}"'
+    if value[0] in ' \t' or value[-1] in ' \t':
+        return f"'{value}'"
+    # 会被解析成数字/布尔/空值的裸标量加单引号（'3.8'、'123'等）
+    if _RESOLVER.resolve(yaml.nodes.ScalarNode, value, (True, False)) != _STR_TAG:
+        return f"'{value}'"
+    return value
+
+
+def _emit_entry(key: Any, value: Any, indent: int, lines: List[str]):
+    """发射映射中的一个键值对"""
+    if not isinstance(key, str):
+        raise _FastDumpUnsupported
+    pad = ' ' * indent
+    key_text = _format_scalar(key)
+    if isinstance(value, dict):
+        if value:
+            lines.append(f'{pad}{key_text}:')
+            _emit_block(value, indent + 2, lines)
+        else:
+            lines.append(f'{pad}{key_text}: {{}}')
+    elif isinstance(value, list):
+        if value:
+            lines.append(f'{pad}{key_text}:')
+            _emit_block(value, indent + 2, lines)
+        else:
+            lines.append(f'{pad}{key_text}: []')
+    elif value is None:
+        raise _FastDumpUnsupported
+    else:
+        lines.append(f'{pad}{key_text}: {_format_scalar(value)}')
+
+
+def _emit_block(value: Any, indent: int, lines: List[str]):
+    """递归发射非空的映射/序列块"""
+    pad = ' ' * indent
+    if isinstance(value, dict):
+        for k, v in value.items():
+            _emit_entry(k, v, indent, lines)
+    else:
+        for item in value:
+            if isinstance(item, dict):
+                if not item:
+                    raise _FastDumpUnsupported
+                sub: List[str] = []
+                _emit_block(item, indent + 2, sub)
+                # 首个键顶到破折号后面，其余行保持 +2 缩进对齐
+                lines.append(f'{pad}- {sub[0][indent + 2:]}')
+                lines.extend(sub[1:])
+            elif isinstance(item, list):
+                raise _FastDumpUnsupported
+            else:
+                lines.append(f'{pad}- {_format_scalar(item)}')
+
+
+def fast_dump_compose(config: Dict[str, Any]) -> str:
+    """
+    针对 compose 固定结构的专用 YAML 发射器
+
+    只处理 dict/list/str/int/float/bool 的块式结构，输出与
+    MyDumper（缩进的序列破折号、顶级键之间空行、同样的引号规则）
+    逐字节一致；遇到子集之外的值抛 _FastDumpUnsupported，
+    由调用方回退到 PyYAML 路径。
+    """
+    if not isinstance(config, dict) or not config:
+        raise _FastDumpUnsupported
+
+    blocks = []
+    for key, value in config.items():
+        lines: List[str] = []
+        _emit_entry(key, value, 0, lines)
+        blocks.append('\n'.join(lines))
+
+    # 顶级键之间以空行分隔，与 MyDumper.write_line_break 的行为一致
+    return '\n\n'.join(blocks) + '\n'
+
+
 def clean_yaml_output(yaml_content: str) -> str:
     """
     清理 YAML 输出，移除不必要的空行和格式问题
@@ -108,19 +232,29 @@ def dump_compose_config(config: Dict[str, Any],
     if clean:
         config = sanitize_compose_config(config)
     
-    # 使用自定义 Dumper 生成 YAML
-    yaml_content = yaml.dump(
-        config,
-        Dumper=MyDumper,
-        default_flow_style=False,
-        sort_keys=False,
-        allow_unicode=True,
-        indent=2,
-        width=float('inf')
-    )
-    
-    # 清理输出格式
-    yaml_content = clean_yaml_output(yaml_content)
+    # 优先走专用发射器，输出与 MyDumper 一致但跳过 PyYAML 的
+    # 事件流/表示器机制；不支持的值回退到原路径
+    yaml_content = None
+    if not _STRICT_YAML:
+        try:
+            yaml_content = fast_dump_compose(config)
+        except _FastDumpUnsupported:
+            pass
+
+    if yaml_content is None:
+        # 使用自定义 Dumper 生成 YAML
+        yaml_content = yaml.dump(
+            config,
+            Dumper=MyDumper,
+            default_flow_style=False,
+            sort_keys=False,
+            allow_unicode=True,
+            indent=2,
+            width=float('inf')
+        )
+
+        # 清理输出格式
+        yaml_content = clean_yaml_output(yaml_content)
     
     # 添加生成信息头
     if add_header:
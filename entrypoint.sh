@@ -181,6 +181,7 @@ exec gunicorn \
     --threads 4 \
     -b 0.0.0.0:5000 \
     --timeout 120 \
+    --keep-alive 75 \
     --access-logfile /dev/null \
     --error-logfile - \
     --capture-output \